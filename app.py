@@ -1,41 +1,37 @@
 import streamlit as st
 import random
 from datetime import datetime
-from transformers import pipeline
 import time
-import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from utils.style_utils import inject_global_styles
+from utils import analysis, journal_store, spiral_monitor
+from utils import tracing
+from utils.tracing import span
+from utils.analysis import (
+    simple_pattern_detection,
+    get_spiral_level,
+    get_mood_emoji,
+    get_emotion_vector,
+    get_heuristic_emotion,
+    cascade_pattern,
+    cascade_emotion,
+    get_personality_type,
+)
+from utils.journal_store import detect_spiral_patterns
+from utils.near_duplicates import NearDuplicateIndex
 inject_global_styles()
-import nltk
-from textblob import download_corpora
 
-try:
-    download_corpora.download_all()
-except:
-    nltk.download('punkt')
-    nltk.download('averaged_perceptron_tagger')
-    nltk.download('brown')
+analysis.ensure_corpora()
 
 def initialize_database():
-    conn = sqlite3.connect("user_journal.db")  
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS journal (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            input_text TEXT,
-            mood TEXT,
-            spiral_level INTEGER,
-            pattern TEXT,
-            emotion TEXT,
-            response_type TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    journal_store.initialize_database()
 
 # Call the initializer at startup
 initialize_database()
+# Validate the response templates now, so a broken catalog stops the app before the first submit
+response_catalog = analysis.get_response_catalog()
 
 # Page config
 st.set_page_config(
@@ -118,275 +114,28 @@ if 'user_mood' not in st.session_state:
 @st.cache_resource(show_spinner="Loading analysis models...")
 def load_models():
     try:
-        classifier = pipeline(
-            "zero-shot-classification",
-            model="typeform/distilbert-base-uncased-mnli",
-            device=-1  # Use CPU
-        )
-        return classifier
+        return analysis.load_classifier()
     except Exception as e:
         st.error(f"Model loading failed: {str(e)}")
         return None
 
-def simple_pattern_detection(text):
-    """Fallback pattern detection when models fail"""
-    overthinking_keywords = {
-        "catastrophic thinking": ["worst", "disaster", "terrible", "awful", "horrible"],
-        "rumination": ["over and over", "can't stop thinking", "keep thinking"],
-        "self-doubt": ["not good enough", "can't do this", "failure", "stupid"],
-        "anxiety spiral": ["what if", "anxious", "nervous", "scared", "panic"],
-        "decision paralysis": ["can't decide", "don't know", "what should", "which one"]
-    }
-    
-    text_lower = text.lower()
-    for pattern, keywords in overthinking_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return pattern, 0.8  # Medium confidence
-    
-    return "normal reflection", 0.5
-
-def detect_overthinking_pattern(text, classifier):
-    """Detect overthinking patterns using the classifier"""
-    if classifier is None:
-        return simple_pattern_detection(text)
-    
-    try:
-        result = classifier(
-            text,
-            candidate_labels=[
-                "catastrophic thinking",
-                "rumination", 
-                "self-doubt",
-                "anxiety spiral",
-                "decision paralysis",
-                "normal reflection"
-            ]
-        )
-        return result['labels'][0], result['scores'][0]
-    except Exception as e:
-        st.warning(f"Pattern detection failed: {str(e)}")
-        return simple_pattern_detection(text)
-
-def get_spiral_level(text, pattern):
-    """Calculate overthinking intensity (1-10)"""
-    negative_words = ['worried', 'anxious', 'scared', 'terrible', 'awful', 'hate', 'stupid']
-    questions = text.count('?')
-    negative_count = sum(1 for word in negative_words if word in text.lower())
-    
-    base_score = min(len(text) // 50, 5)
-    question_score = min(questions * 1.5, 3)
-    negative_score = min(negative_count * 0.5, 2)
-    
-    total = int(base_score + question_score + negative_score)
-    return min(max(total, 1), 10)
-
-def get_mood_emoji(text):
-    """Simple mood detection"""
-    positive_words = ['happy', 'joy', 'excited', 'good', 'great', 'love']
-    negative_words = ['sad', 'angry', 'hate', 'awful', 'terrible']
-    
-    if any(word in text.lower() for word in positive_words):
-        return random.choice(["🌈 Hopeful", "✨ Excited", "🌸 Peaceful"])
-    elif any(word in text.lower() for word in negative_words):
-        return random.choice(["🌀 Anxious", "🌧️ Sad", "🌪️ Overwhelmed"])
-    else:
-        return random.choice(["🌼 Neutral", "🌿 Contemplative", "☁️ Pensive"])
-
-def get_preferred_response_type(chat_history=None):
-    conn = sqlite3.connect("spiral_memory.db")
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT response_type FROM spiral_logs WHERE spiral_level >= 6")
-    rows = cursor.fetchall()
-    conn.close()
-
-    if not rows:
-        return "validation"  # default if no history
-
-    types = [r[0] for r in rows if r[0]]
-    most_common = Counter(types).most_common(1)[0][0]
-    return most_common
-
-from collections import Counter
-import datetime
-def detect_spiral_patterns():
-    conn = sqlite3.connect("spiral_memory.db")
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT timestamp, spiral_level, detected_emotion  FROM spiral_logs")
-    rows = cursor.fetchall()
-    conn.close()
-
-    if not rows:
-        return None  # not enough data
-
-    hours = []
-    weekdays = []
-    emotions = []
-
-    for row in rows:
-        ts, level, emotion = row
-        dt = datetime.datetime.fromisoformat(ts)
-        if int(level) >= 6:  # consider only high spirals
-            hours.append(dt.hour)
-            weekdays.append(dt.strftime("%A"))
-            emotions.append(emotion)
-
-    if not hours or not weekdays:
-        return None
-
-    # Get most common hour and day
-    common_hour = Counter(hours).most_common(1)[0][0]
-    common_day = Counter(weekdays).most_common(1)[0][0]
-    common_emotion = Counter(emotions).most_common(1)[0][0] if emotions else None
-
-    return {
-        "hour": common_hour,
-        "day": common_day,
-        "emotion": common_emotion
-    }
-
-
-def generate_buddy_response(text, pattern, response_type, spiral_level, classifier):
+def generate_buddy_response(text, pattern, response_type, spiral_level, classifier, dominant_emotion=None, variant=None):
     """Generate more personalized responses using ML"""
-    preferred_tone = get_preferred_response_type(st.session_state.chat_history)
-    if response_type == "mirror_me":
-        response_type = preferred_tone
-    # Get emotional tone
-    try:
-        emotion_result = classifier(
-            text,
-            candidate_labels=["fear", "anger", "sadness", "joy", "love", "surprise", "anxiety"]
-        )
-        dominant_emotion = emotion_result['labels'][0]
-        emotion_confidence = emotion_result['scores'][0]
-    except:
-        dominant_emotion = "emotion"
-        emotion_confidence = 0
-    
-    # Enhanced responses incorporating ML insights
-    responses = {
-        "validation": {
-            "low": [
-                f"I sense {dominant_emotion} in your words. That’s completely valid. It's okay to feel what you're feeling — no judgment here. Emotions are part of being human, and I'm here to hold space for you.",
-                f"Your feelings of {dominant_emotion} make total sense in this situation. You’re not overreacting — you’re reacting. Whatever you’re carrying right now, I want you to know it’s real, and I’m not going anywhere.",
-                f"I hear you, and this {dominant_emotion} is a normal response. You don’t need to justify it — just feeling it is enough. Let's just take this moment to sit with it, together."
-            ],
-            "high": [
-                f"This {dominant_emotion} feels overwhelming, I can tell — and that’s completely valid. Sometimes the weight of things hits us like a wave, and it’s okay to feel like you're drowning. I’m right here with you in this.",
-                f"Your {dominant_emotion} is coming through strongly, and that sounds really exhausting. It’s okay to be tired of carrying so much. You’re allowed to just exist right now — no fixing, no faking.",
-                f"I can feel the intensity of this {dominant_emotion}, and you don't have to go through it alone. Whatever triggered this, it matters because *you* matter. I'm listening, fully and without judgment."
-            ]
-        },
-        "tough_love": {
-            "low": [
-                f"That {dominant_emotion} is real, and I’m not dismissing it — but let’s gently ask: is this thought helping you or hurting you? Sometimes our minds trick us into believing fear as fact.",
-                f"I see the {dominant_emotion}, and it’s completely okay to feel it — but is this worry based on solid ground? Let’s pause and look at what’s true, not just what’s loud.",
-                f"Your {dominant_emotion} is valid, truly. But I want to challenge you — is this belief serving your peace, or stealing it? You’re stronger than the story anxiety is telling you right now."
-            ],
-            "high": [
-                f"This {dominant_emotion} storm is loud, but you are not powerless inside it. Let's anchor in what we know is true, even if it’s just one small fact. Start there, gently.",
-                f"Your brain is turning up the volume on this {dominant_emotion}, and that’s okay — but let’s not take every thought as gospel. You’ve faced harder things than this before, haven’t you?",
-                f"That {dominant_emotion} is shouting right now, but it's not the whole truth. Take a deep breath. Come back to the evidence. What would you say to a friend thinking this?"
-            ]
-        },
-        "humor": {
-            "low": [
-                f"Okay but... your brain really said ‘let me feel *all* the {dominant_emotion} today’? 😅 Honestly, same. Emotions can be drama queens sometimes — and that’s kinda what makes us awesome.",
-                f"Plot twist: What if this {dominant_emotion} is just your inner drama director yelling ‘Action!’ again? Maybe give them a coffee and tell them to chill. ☕️",
-                f"Your {dominant_emotion} deserves an Oscar for Most Dramatic Performance. 🏆 It’s putting on a whole production in your head — should we name it something? The Spiral Saga?"
-            ],
-            "high": [
-                f"Breaking News: Local brain declares national {dominant_emotion} emergency! 🗞️ No survivors… except you, because you’re strong and slightly sarcastic. You got this.",
-                f"Your {dominant_emotion} just wrote a full-on Netflix drama. Season 2 pending. But maybe — just maybe — you can take back the director's chair today. 🎬",
-                f"Okay this {dominant_emotion} is working *overtime*. Someone give it a lunch break. You, on the other hand, deserve peace... and probably a cookie. 🍪"
-            ]
-        },
-        "distraction": {
-                "low": [
-                f"Let’s take a little break from this {dominant_emotion}. What’s something small that brought you even 2% joy this week? Let’s go there, even if just for a moment.",
-                f"Your {dominant_emotion} might just need a pause, not a solution. So, tell me: what’s your comfort food? Or the last movie that made you laugh out loud?",
-                f"Mental reset time: What’s something unrelated to this {dominant_emotion}? Maybe a silly childhood memory? Something that reminds you who you are beyond the spiral?"
-            ],
-            "high": [
-                f"EMERGENCY DISTRACTION 🚨 Your {dominant_emotion} is looping — let’s name 5 things you can see, 4 you can touch, 3 you can hear... you know the drill. Ground yourself.",
-                f"Your {dominant_emotion} is like a playlist on repeat. Let’s skip to a better track — tell me your favorite feel-good memory or comfort series to binge.",
-                f"Spiral interrupt in progress! 🛑 Let’s pivot. What’s a place you dream of visiting? Let’s talk about that instead — sometimes the brain just needs new scenery, even imaginary."
-            ]
-        }
-    }
-    
-    intensity = "high" if spiral_level >= 6 else "low"
-    return random.choice(responses[response_type][intensity])
-
-from collections import Counter
-def get_preferred_response_type(history):
-    if not history:
-        return "validation"
-    
-    weights = {"validation": 0, "tough_love": 0, "humor": 0, "distraction": 0}
-    total = len(history)
-
-    for i, entry in enumerate(history):
-        rt = entry.get("response_type")
-        if rt in weights:
-            weight = 1 + (i / total)  # later entries count more
-            weights[rt] += weight
-    
-    return max(weights, key=weights.get)
-
-def get_personality_type(pattern_history):
-    """Determine overthinking personality type"""
-    if not pattern_history:
-        return "The New Overthinker"
-    
-    pattern_counts = {}
-    for pattern in pattern_history:
-        pattern_counts[pattern] = pattern_counts.get(pattern, 0) + 1
-    
-    dominant_pattern = max(pattern_counts, key=pattern_counts.get)
-    
-    types = {
-        "catastrophic thinking": "The Catastrophizer",
-        "rumination": "The Retrospective Overanalyzer", 
-        "self-doubt": "The Self-Doubt Ninja",
-        "anxiety spiral": "The Spiral Queen",
-        "decision paralysis": "The Indecisive Icon",
-        "normal reflection": "The Balanced Thinker"
-    }
-    
-    return types.get(dominant_pattern, "The Overthinker")
-import sqlite3
-
-# Connect to SQLite database (or create it if it doesn't exist)
-conn = sqlite3.connect("user_journal.db", check_same_thread=False)
-c = conn.cursor()
-
-# Create a table to store journal entries if it doesn't already exist
-c.execute("""
-CREATE TABLE IF NOT EXISTS journal (
-    timestamp TEXT,
-    input_text TEXT,
-    mood TEXT,
-    spiral_level INTEGER,
-    pattern TEXT,
-    emotion TEXT,
-    response_type TEXT
-)
-""")
-conn.commit()
+    response = analysis.generate_buddy_response(
+        text, pattern, response_type, spiral_level, classifier,
+        dominant_emotion=dominant_emotion, variant=variant,
+        history=st.session_state.chat_history
+    )
+    if response_catalog.last_error:
+        st.warning(response_catalog.last_error)
+    return response
 
-from datetime import datetime
-def save_entry(input_text, mood, spiral_level, pattern, emotion, response_type):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    conn = sqlite3.connect("user_journal.db")
-    c = conn.cursor()
-    c.execute("""
-    INSERT INTO journal (timestamp, input_text, mood, spiral_level, pattern, emotion, response_type)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (timestamp, input_text, mood, spiral_level, pattern, emotion, response_type))
-    conn.commit()
-    conn.close()
+def save_entry(input_text, mood, spiral_level, pattern, emotion, response_type, dominant_emotion=None,
+               emotion_confidence=None):
+    """Save to SQLite and session state; returns the spiral escalation alert, if any"""
+    timestamp, alert = journal_store.save_entry(input_text, mood, spiral_level, pattern, emotion, response_type,
+                                                dominant_emotion=dominant_emotion,
+                                                emotion_confidence=emotion_confidence)
     
     # Also update session state
     if 'chat_history' not in st.session_state:
@@ -401,68 +150,8 @@ def save_entry(input_text, mood, spiral_level, pattern, emotion, response_type):
         'mood': mood,
         'timestamp': timestamp
     })
-def load_history():
-    """Load chat history from database into session state"""
-    conn = sqlite3.connect("user_journal.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT timestamp, input_text, mood, spiral_level, pattern, response_type FROM journal ORDER BY timestamp DESC LIMIT 50")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    history = []
-    for row in rows:
-        history.append({
-            'timestamp': row[0],
-            'input': row[1],
-            'mood': row[2],
-            'spiral_level': row[3],
-            'pattern': row[4],
-            'response_type': row[5],
-            'response': ""  # Responses aren't stored in DB in current setup
-        })
-    
-    return history
-from textblob import TextBlob
-
-def get_emotion_vector(text):
-    emotion_vector = {
-        "joy": 0.0,
-        "sadness": 0.0,
-        "anger": 0.0,
-        "fear": 0.0,
-        "guilt": 0.0
-    }
-    
-    blob = TextBlob(text.lower())
-    polarity = blob.sentiment.polarity
-    words = blob.words
-
-    # Heuristic: keywords + sentiment
-    if any(word in words for word in ["happy", "excited", "love", "grateful", "smile", "laugh"]):
-        emotion_vector["joy"] += 0.5 + max(polarity, 0)
-    if any(word in words for word in ["sad", "lonely", "cry", "miss", "empty"]):
-        emotion_vector["sadness"] += 0.5 - min(polarity, 0)
-    if any(word in words for word in ["angry", "mad", "hate", "annoyed", "frustrated"]):
-        emotion_vector["anger"] += 0.6
-    if any(word in words for word in ["worried", "anxious", "scared", "panic", "fear"]):
-        emotion_vector["fear"] += 0.6
-    if any(word in words for word in ["sorry", "regret", "guilty", "ashamed"]):
-        emotion_vector["guilt"] += 0.7
+    return alert
 
-    # Normalize to 0-1
-    max_val = max(emotion_vector.values()) or 1
-    for key in emotion_vector:
-        emotion_vector[key] = round(emotion_vector[key] / max_val, 2)
-    
-    return emotion_vector
-from collections import Counter
-
-def get_preferred_response_type(history):
-    types = [entry['response_type'] for entry in history]
-    if not types:
-        return "validation"  # fallback
-    counter = Counter(types)
-    return counter.most_common(1)[0][0]
 import pandas as pd
 import io
 
@@ -487,6 +176,78 @@ def export_journal():
         mime="text/csv"
     )
 
+@st.cache_resource
+def get_near_duplicate_index():
+    """SimHash index of recent entries, used to spot rumination loops"""
+    return NearDuplicateIndex()
+
+def submit_refinement(executor, fn, *args):
+    """Run fn in the background while keeping st.* calls tied to this session"""
+    ctx = get_script_run_ctx()
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+    return executor.submit(run)
+
+def render_debug_panel():
+    """Sidebar table of per-stage latency percentiles (only shown with BUDDY_TRACE=1)"""
+    st.markdown("---")
+    with st.expander("🛠️ Debug: stage timings"):
+        stats = tracing.snapshot()
+        if not stats:
+            st.caption("No stages recorded yet. Submit a thought to collect timings.")
+            return
+        st.dataframe(
+            [{"stage": name, **values} for name, values in stats.items()],
+            hide_index=True,
+            use_container_width=True
+        )
+        st.caption(f"Latest snapshot written to `{tracing.METRICS_PATH}` after each submit.")
+        cascade = analysis.cascade_stats.report()
+        if cascade:
+            st.markdown("**Model cascade routing**")
+            st.dataframe(
+                [{"task": task, **values} for task, values in cascade.items()],
+                hide_index=True,
+                use_container_width=True
+            )
+        if st.button("Reset timings", use_container_width=True):
+            tracing.reset()
+
+def render_results_panel(panel, pattern, spiral_level, mood, buddy_response, refining=False, alert=None):
+    """Draw (or redraw) the analysis panel inside an st.empty() placeholder"""
+    with panel.container():
+        cols = st.columns(3)
+        with cols[0]:
+            st.metric("🌺 Detected Pattern", pattern.replace("_", " ").title())
+        with cols[1]:
+            st.metric("🌀 Spiral Intensity", f"{spiral_level}/10")
+        with cols[2]:
+            st.metric("🌈 Current Mood", mood)
+        
+        # Visual spiral meter
+        st.markdown("### Your Spiral Meter")
+        spiral_bar = "🌸" * spiral_level + "⚪" * (10 - spiral_level)
+        st.progress(spiral_level/10, text=f"`{spiral_bar}` {spiral_level}/10")
+        
+        # Buddy response
+        st.markdown("### 💖 Your Buddy Says:")
+        st.markdown(f"""
+        <div style="
+            background-color: #fff0f5;
+            padding: 15px;
+            border-radius: 15px;
+            border-left: 5px solid #ff9ff3;
+            margin-bottom: 20px;
+        ">
+            {buddy_response}
+        </div>
+        """, unsafe_allow_html=True)
+        if alert:
+            st.warning(spiral_monitor.describe(alert))
+        if refining:
+            st.caption("✨ First impressions shown — refining with the analysis model...")
+
 def main():
     # Header with personality
     col1, col2 = st.columns([1, 3])
@@ -541,6 +302,9 @@ def main():
                 cols[i].write(f"• {mood}")
         else:
             st.write("Share your thoughts to see your stats!")
+        
+        if tracing.is_enabled():
+            render_debug_panel()
     
     # Main chat interface
     st.markdown("### 💭 What's swirling in that beautiful mind?")
@@ -554,99 +318,126 @@ def main():
     
     if st.button("Help me process this 🌸", type="primary", use_container_width=True):
         if user_input.strip():
-            with st.spinner("Decoding your thoughts..."):
-                try:
-                    # Detect pattern
-                    pattern, confidence = detect_overthinking_pattern(user_input, classifier)
-                    
-                    # Get spiral level and mood
+            submit_started = time.perf_counter()
+            try:
+                # Stage 1: instant heuristic results, shown straight away
+                with span("heuristic_stage"):
+                    pattern, confidence = simple_pattern_detection(user_input)
                     spiral_level = get_spiral_level(user_input, pattern)
                     mood = get_mood_emoji(user_input)
+                    emotion_vector = get_emotion_vector(user_input)
+                    dominant_emotion, emotion_confidence = get_heuristic_emotion(emotion_vector), 0
                     
-                    # Generate response
-                    buddy_response = generate_buddy_response(user_input, pattern, response_type, spiral_level, classifier)
-                    
-                    # Display results
-                    st.markdown("---")
-                    
-                    cols = st.columns(3)
-                    with cols[0]:
-                        st.metric("🌺 Detected Pattern", pattern.replace("_", " ").title())
-                    with cols[1]:
-                        st.metric("🌀 Spiral Intensity", f"{spiral_level}/10")
-                    with cols[2]:
-                        st.metric("🌈 Current Mood", mood)
+                    # A near-duplicate of a recent entry already has model results to reuse
+                    loop_match, loop_count = get_near_duplicate_index().find(user_input)
+                    if loop_match:
+                        pattern, confidence = loop_match['pattern'], loop_match['confidence']
+                        dominant_emotion, emotion_confidence = loop_match['emotion'], loop_match['emotion_confidence']
                     
-                    # Visual spiral meter
-                    st.markdown("### Your Spiral Meter")
-                    spiral_bar = "🌸" * spiral_level + "⚪" * (10 - spiral_level)
-                    st.progress(spiral_level/10, text=f"`{spiral_bar}` {spiral_level}/10")
+                    # O(1) preview of the escalation check that save_entry makes authoritative
+                    _, spiral_alert = spiral_monitor.update(journal_store.load_spiral_state(), spiral_level)
                     
-                    # Buddy response
-                    st.markdown("### 💖 Your Buddy Says:")
-                    st.markdown(f"""
-                    <div style="
-                        background-color: #fff0f5;
-                        padding: 15px;
-                        border-radius: 15px;
-                        border-left: 5px solid #ff9ff3;
-                        margin-bottom: 20px;
-                    ">
-                        {buddy_response}
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Save to history
-                    st.session_state.chat_history.append({
-                        'input': user_input,
-                        'pattern': pattern,
-                        'spiral_level': spiral_level,
-                        'response': buddy_response,
-                        'response_type': response_type,
-                        'mood': mood,
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
-                    })
-
-                    emotion_vector = get_emotion_vector(user_input)
-                    save_entry(user_input, mood, spiral_level, pattern, str(emotion_vector), response_type)
-
-                    pattern = detect_spiral_patterns()
-                    if pattern:
-                        st.markdown("---")
-                        st.markdown("### 📊 Here's something I've noticed about you:")
-                        st.markdown(f"""
-                        - 🌙 You tend to spiral most often around **{pattern['hour']}:00**.
-                        - 📅 **{pattern['day']}s** seem to be emotionally tougher than others.
-                        - 😔 The most frequent emotion during your spirals is **{pattern['emotion']}**.
-                        
-                        Just bringing this to your awareness. Let me know if you want help making sense of it.
-                        """)
-
-                    # Add follow-up buttons after each response
+                    variant = random.randrange(3)
+                    buddy_response = generate_buddy_response(
+                        user_input, pattern, response_type, spiral_level, classifier,
+                        dominant_emotion=dominant_emotion, variant=variant
+                    )
+                
+                # Display results
+                st.markdown("---")
+                if loop_count:
+                    st.info(f"🔁 You've looped on this thought {loop_count} time{'s' if loop_count > 1 else ''} recently. "
+                            "Noticing the loop is the first step out of it.")
+                results_panel = st.empty()
+                needs_model = classifier is not None and not loop_match
+                render_results_panel(results_panel, pattern, spiral_level, mood, buddy_response,
+                                     refining=needs_model, alert=spiral_alert)
+                if tracing.is_enabled():
+                    tracing.record("first_paint", time.perf_counter() - submit_started)
+                
+                # Stage 2: model-based pattern and emotion refine the panel as they arrive
+                if needs_model:
+                    # A pool per submit, so concurrent sessions never queue behind each other's model calls
+                    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="buddy-refine") as executor:
+                        # In cascade mode (BUDDY_CASCADE_THRESHOLD) clear-cut entries skip the model
+                        pattern_future = submit_refinement(executor, cascade_pattern, user_input, classifier,
+                                                           analysis.CASCADE_THRESHOLD, st.warning)
+                        emotion_future = submit_refinement(executor, cascade_emotion, user_input, classifier,
+                                                           analysis.CASCADE_THRESHOLD)
+
+                        pattern, confidence, pattern_tier = pattern_future.result()
+                        render_results_panel(results_panel, pattern, spiral_level, mood, buddy_response,
+                                             refining=True, alert=spiral_alert)
+
+                        dominant_emotion, emotion_confidence, emotion_tier = emotion_future.result()
+                    buddy_response = generate_buddy_response(
+                        user_input, pattern, response_type, spiral_level, classifier,
+                        dominant_emotion=dominant_emotion, variant=variant
+                    )
+                    render_results_panel(results_panel, pattern, spiral_level, mood, buddy_response,
+                                         alert=spiral_alert)
+                
+                # Save to history with the refined values
+                st.session_state.chat_history.append({
+                    'input': user_input,
+                    'pattern': pattern,
+                    'spiral_level': spiral_level,
+                    'response': buddy_response,
+                    'response_type': response_type,
+                    'mood': mood,
+                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
+                })
+
+                saved_alert = save_entry(user_input, mood, spiral_level, pattern, str(emotion_vector), response_type,
+                                         dominant_emotion, emotion_confidence)
+                if saved_alert != spiral_alert:
+                    # Another tab saved in between; show what the stored state says
+                    spiral_alert = saved_alert
+                    render_results_panel(results_panel, pattern, spiral_level, mood, buddy_response,
+                                         alert=spiral_alert)
+                get_near_duplicate_index().add(user_input, pattern, confidence, dominant_emotion, emotion_confidence)
+
+                pattern = detect_spiral_patterns()
+                if pattern:
                     st.markdown("---")
-                    st.markdown("### 💬 Continue this conversation:")
-                    cols = st.columns(2)
-                    with cols[0]:
-                        if st.button(" Tell me more about this", key="more", use_container_width=True):
-                            user_input = f"About what you said: '{buddy_response[:50]}...' - can you elaborate?"
-                    with cols[1]:
-                        if st.button(" Change the subject", key="change", use_container_width=True):
-                            user_input = "Actually, I'd like to talk about something else..."
-                    
-                except Exception as e:
-                    st.error(f"Oops! Something went wrong: {str(e)}")
-                    st.info("Here's a generic response to help:")
+                    st.markdown("### 📊 Here's something I've noticed about you:")
                     st.markdown(f"""
-                    <div style="
-                        background-color: #fff0f5;
-                        padding: 15px;
-                        border-radius: 15px;
-                        border-left: 5px solid #ff9ff3;
-                        margin-bottom: 20px;
-                    ">
-                        I'm here for you. Whatever you're feeling is valid. Try taking three deep breaths with me?
-                    </div>
-                    """, unsafe_allow_html=True)
+                    - 🌙 You tend to spiral most often around **{pattern['hour']}:00**.
+                    - 📅 **{pattern['day']}s** seem to be emotionally tougher than others.
+                    - 😔 The most frequent emotion during your spirals is **{pattern['emotion']}**.
+                    
+                    Just bringing this to your awareness. Let me know if you want help making sense of it.
+                    """)
+
+                # Add follow-up buttons after each response
+                st.markdown("---")
+                st.markdown("### 💬 Continue this conversation:")
+                cols = st.columns(2)
+                with cols[0]:
+                    if st.button(" Tell me more about this", key="more", use_container_width=True):
+                        user_input = f"About what you said: '{buddy_response[:50]}...' - can you elaborate?"
+                with cols[1]:
+                    if st.button(" Change the subject", key="change", use_container_width=True):
+                        user_input = "Actually, I'd like to talk about something else..."
+                
+                if tracing.is_enabled():
+                    tracing.record("submit_total", time.perf_counter() - submit_started)
+                    tracing.write_metrics()
+                
+            except Exception as e:
+                st.error(f"Oops! Something went wrong: {str(e)}")
+                st.info("Here's a generic response to help:")
+                st.markdown(f"""
+                <div style="
+                    background-color: #fff0f5;
+                    padding: 15px;
+                    border-radius: 15px;
+                    border-left: 5px solid #ff9ff3;
+                    margin-bottom: 20px;
+                ">
+                    I'm here for you. Whatever you're feeling is valid. Try taking three deep breaths with me?
+                </div>
+                """, unsafe_allow_html=True)
         else:
             st.warning("Please share what's on your mind first!")
     
@@ -0,0 +1,89 @@
+# benchmarks/cascade_report.py
+"""Show what each cascade threshold would trade: model calls saved vs agreement.
+
+Usage:
+    python -m benchmarks.cascade_report --db user_journal.db --limit 500
+    python -m benchmarks.cascade_report --synthetic 300 --thresholds 0.2,0.33,0.5
+
+Every entry is classified once by the zero-shot model (the "model-only"
+answer). Then each threshold is replayed against the heuristic scores, which
+gives the exact share routed to each tier and how often the cascade matches
+the model-only answer.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from utils import analysis
+from benchmarks.synthetic_journal import make_entry_text
+
+
+def load_corpus(db_path=None, synthetic=0, limit=500):
+    if db_path:
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT input_text FROM journal WHERE input_text != '' ORDER BY rowid DESC LIMIT ?",
+                            (limit,)).fetchall()
+        conn.close()
+        return [r[0] for r in rows]
+    rng = random.Random(3)
+    return [make_entry_text(rng)[1] for _ in range(synthetic)]
+
+
+def replay(entries, threshold):
+    """Route pre-scored entries at one threshold and compare with the model answers"""
+    report = {}
+    for task in ("pattern", "emotion"):
+        heuristic = agreed = 0
+        for entry in entries:
+            label, margin, model_label = entry[task]
+            if label and margin >= threshold:
+                heuristic += 1
+                agreed += label == model_label
+            else:
+                agreed += 1  # the cascade asked the model, so it matches by definition
+        report[task] = {
+            "heuristic_share": round(heuristic / len(entries), 3),
+            "model_share": round(1 - heuristic / len(entries), 3),
+            "agreement": round(agreed / len(entries), 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascade routing vs agreement report")
+    parser.add_argument("--db", default=None, help="Journal database to take entries from")
+    parser.add_argument("--synthetic", type=int, default=300, help="Synthetic entries when --db is not given")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--thresholds", default="0.1,0.2,0.33,0.5,0.75")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.db, args.synthetic, args.limit)
+    if not texts:
+        sys.exit("No entries to evaluate")
+    classifier = analysis.load_classifier()
+
+    entries = []
+    for text in texts:
+        pattern_label, _, pattern_margin = analysis.score_margin(analysis.heuristic_pattern_scores(text))
+        emotion_label, _, emotion_margin = analysis.score_margin(analysis.heuristic_emotion_scores(text))
+        entries.append({
+            "pattern": (pattern_label, pattern_margin, analysis.detect_overthinking_pattern(text, classifier)[0]),
+            "emotion": (emotion_label, emotion_margin, analysis.detect_dominant_emotion(text, classifier)[0]),
+        })
+
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+    print(json.dumps({
+        "entries": len(entries),
+        "thresholds": {str(t): replay(entries, t) for t in thresholds},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# benchmarks/load_test.py
+"""Drive many concurrent simulated users through the submit flow and trends page.
+
+Usage:
+    python -m benchmarks.load_test --sessions 1,4,16,32 --submits 20 --entries 100k
+    python -m benchmarks.load_test --mode apptest --sessions 4 --submits 3 --no-model
+
+Sessions are threads, like Streamlit's own per-session script threads, and
+share one classifier the way st.cache_resource does. "library" mode calls the
+same entry points as app.py's submit path and reads trends through one shared
+JournalFeed (load.trends_cold is its first full read, load.trends_page each
+incremental view after that); "apptest" mode runs app.py and
+pages/trends.py through Streamlit's headless AppTest, one process per session
+since AppTest instances can't run concurrently in one process (--no-model
+there sets BUDDY_PATTERN_BACKEND=keywords for the app). Each concurrency level
+runs against a fresh copy of the synthetic database and reports throughput,
+p50/p95/p99 per stage (from utils.tracing, so bucket-interpolated) and SQLite
+lock waits; rising lock waits and flat throughput mark the saturation point.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from utils import analysis, journal_store, tracing
+from utils.near_duplicates import NearDuplicateIndex
+from benchmarks.synthetic_journal import create_databases, make_entry_text, parse_size
+from benchmarks.run_benchmarks import load_trends_page, percentile
+
+RESPONSE_TYPES = ["validation", "tough_love", "humor", "distraction", "mirror_me"]
+
+
+def library_session(session_id, submits, trends_every, classifier, feed, journal_db, spiral_db,
+                    near_duplicates, latencies, errors):
+    """One simulated user: submit entries like main() does, opening trends now and then"""
+    rng = random.Random(session_id)
+    history = []
+    for i in range(submits):
+        text = make_entry_text(rng)[1]
+        started = time.perf_counter()
+        try:
+            with tracing.span("load.heuristic_stage"):
+                pattern, confidence = analysis.simple_pattern_detection(text)
+                spiral_level = analysis.get_spiral_level(text, pattern)
+                mood = analysis.get_mood_emoji(text)
+                emotion_vector = analysis.get_emotion_vector(text)
+            with tracing.span("load.near_duplicate_lookup"):
+                match, _ = near_duplicates.find(text, f"user-{session_id}")
+            if match:
+                pattern, confidence = match["pattern"], match["confidence"]
+                emotion, emotion_confidence = match["emotion"], match["emotion_confidence"]
+            else:
+                pattern, confidence, _ = analysis.cascade_pattern(text, classifier, analysis.CASCADE_THRESHOLD)
+                emotion, emotion_confidence, _ = analysis.cascade_emotion(text, classifier,
+                                                                          analysis.CASCADE_THRESHOLD)
+            response_type = rng.choice(RESPONSE_TYPES)
+            analysis.generate_buddy_response(text, pattern, response_type, spiral_level, classifier,
+                                             dominant_emotion=emotion, history=history)
+            journal_store.save_entry(text, mood, spiral_level, pattern, str(emotion_vector),
+                                     response_type, db_path=journal_db, user_id=f"user-{session_id}",
+                                     dominant_emotion=emotion, emotion_confidence=emotion_confidence)
+            near_duplicates.add(text, pattern, confidence, emotion, emotion_confidence, f"user-{session_id}")
+            journal_store.detect_spiral_patterns(spiral_db)
+            history.append({"response_type": response_type})
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(f"submit: {e}")
+
+        if trends_every and (i + 1) % trends_every == 0:
+            try:
+                # The shared feed only reads entries saved since the last view, like the page's cached feed
+                with tracing.span("load.trends_page"):
+                    feed.refresh()
+                    feed.aggregates()
+            except Exception as e:
+                errors.append(f"trends: {e}")
+
+
+def apptest_session(session_id, submits, trends_every, timeout, run_dir):
+    """One simulated user driving the real scripts through Streamlit's AppTest.
+
+    Runs in its own process (AppTest instances can't run concurrently in one)
+    and returns (latencies, errors, stage histograms, (first, last) submit time).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(run_dir)
+    tracing.set_enabled(True)
+    rng = random.Random(session_id)
+    latencies, errors = [], []
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+    at.run()
+    window_start = time.time()
+    for i in range(submits):
+        started = time.perf_counter()
+        try:
+            with tracing.span("load.app_submit"):
+                at.text_area[0].input(make_entry_text(rng)[1])
+                submit = next(b for b in at.button if b.label.startswith("Help me process"))
+                submit.click().run()
+            if at.exception:
+                errors.append(f"submit: {at.exception[0].message}")
+            elif at.error:  # main() catches and shows errors with st.error
+                errors.append(f"submit: {at.error[0].value}")
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(f"submit: {e}")
+
+        if trends_every and (i + 1) % trends_every == 0:
+            try:
+                with tracing.span("load.trends_page"):
+                    AppTest.from_file(os.path.join(ROOT, "pages", "trends.py"), default_timeout=timeout).run()
+            except Exception as e:
+                errors.append(f"trends: {e}")
+    return latencies, errors, tracing.histograms(), (window_start, time.time())
+
+
+def run_library_sessions(args, sessions, run_dir, classifier):
+    """Library sessions as threads in this process; returns (latencies, errors, elapsed)"""
+    journal_db = os.path.join(run_dir, "user_journal.db")
+    spiral_db = os.path.join(run_dir, "spiral_memory.db")
+    near_duplicates = NearDuplicateIndex(journal_db)
+    feed = load_trends_page(run_dir).JournalFeed(journal_db)
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=library_session, name=f"session-{session_id}",
+                         args=(session_id, args.submits, args.trends_every, classifier, feed, journal_db,
+                               spiral_db, near_duplicates, latencies, errors))
+        for session_id in range(sessions)
+    ]
+    tracing.reset()
+    with tracing.span("load.trends_cold"):
+        feed.refresh()
+        feed.aggregates()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_apptest_sessions(args, sessions, run_dir):
+    """AppTest sessions, one process each; returns (latencies, errors, elapsed)"""
+    tracing.reset()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(sessions) as pool:
+        outcomes = pool.starmap(apptest_session, [(session_id, args.submits, args.trends_every, args.timeout,
+                                                   run_dir) for session_id in range(sessions)])
+    latencies, errors = [], []
+    for session_latencies, session_errors, histograms, _ in outcomes:
+        latencies.extend(session_latencies)
+        errors.extend(session_errors)
+        tracing.merge(histograms)
+    # Process start-up and the first page load aren't part of the measured window
+    elapsed = max(end for *_, (_, end) in outcomes) - min(start for *_, (start, _) in outcomes)
+    return latencies, errors, elapsed
+
+
+def run_level(args, sessions, dataset_dir, classifier):
+    """Run one concurrency level against a fresh copy of the dataset"""
+    run_dir = os.path.join(args.workdir, f"run-{sessions}")
+    shutil.rmtree(run_dir, ignore_errors=True)
+    shutil.copytree(dataset_dir, run_dir)
+    os.chdir(run_dir)  # app.py and trends.py open their databases by relative path
+    journal_store.initialize_database(os.path.join(run_dir, "user_journal.db"))
+
+    if args.mode == "library":
+        latencies, errors, elapsed = run_library_sessions(args, sessions, run_dir, classifier)
+    else:
+        latencies, errors, elapsed = run_apptest_sessions(args, sessions, run_dir)
+
+    latencies.sort()
+    stages = tracing.snapshot()
+    return {
+        "sessions": sessions,
+        "submits": len(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_submits_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "submit_latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+        },
+        "sqlite_lock_wait": stages.get("sqlite_lock_wait"),
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test")
+    parser.add_argument("--mode", choices=["library", "apptest"], default="library")
+    parser.add_argument("--sessions", default="1,4,16", help="Comma separated concurrency levels")
+    parser.add_argument("--submits", type=int, default=10, help="Submits per session")
+    parser.add_argument("--trends-every", type=int, default=5, help="Open the trends page every N submits (0 = never)")
+    parser.add_argument("--entries", default="1k", help="Synthetic dataset size: 1k, 100k, 1m")
+    parser.add_argument("--workdir", default=os.path.join(ROOT, ".bench_data", "load"))
+    parser.add_argument("--no-model", action="store_true", help="Keyword fallback only")
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest per-run timeout in seconds")
+    parser.add_argument("--out", default=None, help="Write results JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    args.workdir = os.path.abspath(args.workdir)
+    out_path = os.path.abspath(args.out) if args.out else None
+    count = parse_size(args.entries)
+    dataset_dir = os.path.join(args.workdir, f"dataset-{args.entries}")
+    if not os.path.exists(os.path.join(dataset_dir, "user_journal.db")):
+        print(f"Generating {count} synthetic entries...", file=sys.stderr)
+        create_databases(dataset_dir, count)
+
+    tracing.set_enabled(True)
+    classifier = None
+    if args.mode == "library" and not args.no_model:
+        classifier = analysis.load_classifier()
+    if args.mode == "apptest" and args.no_model:
+        os.environ["BUDDY_PATTERN_BACKEND"] = "keywords"  # inherited by the session processes
+
+    levels = []
+    for sessions in (int(s) for s in args.sessions.split(",") if s.strip()):
+        print(f"Running {sessions} concurrent sessions...", file=sys.stderr)
+        levels.append(run_level(args, sessions, dataset_dir, classifier))
+
+    payload = json.dumps({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "entries": count,
+        "model": classifier is not None if args.mode == "library" else not args.no_model,
+        "levels": levels,
+    }, indent=2)
+    if out_path:
+        with open(out_path, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# benchmarks/run_benchmarks.py
+"""Time the analysis and storage hot spots against synthetic databases.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 1k,100k,1m --out bench.json
+    python -m benchmarks.run_benchmarks --sizes 1k --compare bench.json
+
+Results are written as JSON so two runs can be diffed; --compare exits with
+status 1 when any p50 got slower than the baseline by more than --threshold.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from utils import analysis, journal_store
+from benchmarks.synthetic_journal import create_databases, make_entry_text, parse_size
+
+SCHEMA_VERSION = 1
+
+
+def percentile(sorted_samples, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    k = min(len(sorted_samples) - 1, max(0, int(round(q / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[k]
+
+
+def time_call(fn, repeat, warmup=1, setup=None):
+    """Run fn repeat times (after warmup) and summarise the timings in milliseconds.
+
+    setup, when given, runs untimed before every call.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 4),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+
+def cycle(items):
+    """Return a zero-arg callable that hands out items round-robin"""
+    state = {"i": 0}
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+    return next_item
+
+
+def load_trends_page(workdir):
+    """Import pages/trends.py in Streamlit bare mode with cwd at workdir.
+
+    The page opens user_journal.db by relative path, so the benchmark just
+    points the working directory at a synthetic dataset.
+    """
+    os.chdir(workdir)
+    spec = importlib.util.spec_from_file_location("trends_page", os.path.join(ROOT, "pages", "trends.py"))
+    trends = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(trends)
+    return trends
+
+
+def bench_text(results, skipped, repeat, use_model):
+    rng = random.Random(7)
+    texts = [make_entry_text(rng)[1] for _ in range(50)]
+
+    results.append({"name": "detect_overthinking_pattern[fallback]", "size": None,
+                    **time_call(lambda t=cycle(texts): analysis.detect_overthinking_pattern(t(), None), repeat)})
+    results.append({"name": "get_emotion_vector", "size": None,
+                    **time_call(lambda t=cycle(texts): analysis.get_emotion_vector(t()), repeat)})
+
+    if not use_model:
+        skipped["detect_overthinking_pattern[model]"] = "disabled with --no-model"
+        return
+    start = time.perf_counter()
+    try:
+        classifier = analysis.load_classifier()
+    except Exception as e:
+        skipped["detect_overthinking_pattern[model]"] = f"model could not be loaded: {e}"
+        return
+    results.append({"name": "load_models", "size": None, "repeat": 1,
+                    "p50_ms": round((time.perf_counter() - start) * 1000, 4)})
+    results.append({"name": "detect_overthinking_pattern[model]", "size": None,
+                    **time_call(lambda t=cycle(texts): analysis.detect_overthinking_pattern(t(), classifier),
+                                max(3, repeat // 10))})
+
+
+def bench_database(trends, results, size_label, count, dataset_dir, repeat, new_rows):
+    # save_entry writes, so run against a scratch copy and keep the cached dataset identical between runs
+    workdir = f"{dataset_dir}-scratch"
+    shutil.rmtree(workdir, ignore_errors=True)
+    shutil.copytree(dataset_dir, workdir)
+    os.chdir(workdir)
+    journal_db = os.path.join(workdir, "user_journal.db")
+    spiral_db = os.path.join(workdir, "spiral_memory.db")
+    journal_store.initialize_database(journal_db)  # adds any tables newer than the dataset
+    db_repeat = repeat if count <= 100_000 else max(3, repeat // 10)
+    rng = random.Random(11)
+
+    def save_one():
+        _, text = make_entry_text(rng)
+        journal_store.save_entry(text, "🌼 Neutral", 5, "rumination", "{}", "validation", db_path=journal_db)
+
+    def cold_load():
+        # What the first dashboard after a server start pays: read every row
+        cold = trends.JournalFeed(journal_db)
+        cold.refresh()
+        cold.aggregates()
+        cold.conn.close()
+
+    feed = trends.JournalFeed(journal_db)
+    feed.refresh()
+
+    def update():
+        feed.refresh()
+        feed.aggregates()
+
+    def add_rows():
+        for _ in range(new_rows):
+            save_one()
+
+    for name, fn, n, setup in [
+        ("save_entry", save_one, repeat, None),
+        ("load_history", lambda: journal_store.load_history(journal_db), db_repeat, None),
+        ("detect_spiral_patterns", lambda: journal_store.detect_spiral_patterns(spiral_db), db_repeat, None),
+        ("trends.feed_cold", cold_load, db_repeat, None),
+        ("trends.feed_idle", update, repeat, None),
+        (f"trends.feed_update[{new_rows} new rows]", update, repeat, add_rows),
+    ]:
+        results.append({"name": name, "size": size_label, **time_call(fn, n, setup=setup)})
+    feed.conn.close()
+
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current, baseline, threshold):
+    """List (name, size, old_p50, new_p50) for every benchmark that slowed down past threshold"""
+    old = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        before = old.get((r["name"], r["size"]))
+        if before and before.get("p50_ms") and r["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            regressions.append((r["name"], r["size"], before["p50_ms"], r["p50_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overthinking Buddy benchmark suite")
+    parser.add_argument("--sizes", default="1k,100k", help="Comma separated: 1k,100k,1m")
+    parser.add_argument("--workdir", default=os.path.join(ROOT, ".bench_data"))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-model", action="store_true", help="Skip the transformer benchmarks")
+    parser.add_argument("--new-rows", type=int, default=10,
+                        help="Entries added before each incremental trends update")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild cached synthetic databases")
+    parser.add_argument("--out", default=None, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # The benchmarks chdir into the dataset folders, so pin user paths first
+    out_path = os.path.abspath(args.out) if args.out else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    dirs = {}
+    for size_label in sizes:
+        count = parse_size(size_label)
+        dirs[size_label] = (count, os.path.join(os.path.abspath(args.workdir), size_label))
+        if args.regenerate or not os.path.exists(os.path.join(dirs[size_label][1], "user_journal.db")):
+            print(f"Generating {count} synthetic entries...", file=sys.stderr)
+            create_databases(dirs[size_label][1], count)
+
+    trends = load_trends_page(dirs[sizes[0]][1])
+
+    results, skipped = [], {}
+    bench_text(results, skipped, args.repeat, not args.no_model)
+    for size_label in sizes:
+        count, workdir = dirs[size_label]
+        bench_database(trends, results, size_label, count, workdir, args.repeat, args.new_rows)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "skipped": skipped,
+    }
+    payload = json.dumps(report, indent=2)
+    if out_path:
+        with open(out_path, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if compare_path:
+        with open(compare_path) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for name, size, before, after in regressions:
+            print(f"REGRESSION {name} [{size}]: p50 {before:.3f}ms -> {after:.3f}ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/synthetic_journal.py
+"""Generate realistic journal / spiral_logs databases for benchmarking.
+
+Usage:
+    python -m benchmarks.synthetic_journal --entries 100k --out .bench_data/100k
+"""
+import argparse
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from utils.sample_entries import FILLERS, PATTERN_FRAGMENTS
+
+MOODS = ["🌈 Hopeful", "✨ Excited", "🌸 Peaceful", "🌀 Anxious", "🌧️ Sad",
+         "🌪️ Overwhelmed", "🌼 Neutral", "🌿 Contemplative", "☁️ Pensive"]
+RESPONSE_TYPES = ["validation", "tough_love", "humor", "distraction"]
+EMOTIONS = ["joy", "sadness", "anger", "fear", "guilt"]
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(value):
+    """Accept 1k / 100k / 1m or a plain integer"""
+    value = str(value).lower()
+    if value in SIZES:
+        return SIZES[value]
+    return int(value)
+
+
+def make_entry_text(rng):
+    pattern = rng.choice(list(PATTERN_FRAGMENTS))
+    sentences = [rng.choice(PATTERN_FRAGMENTS[pattern]) + rng.choice([".", "?", "..."])]
+    for _ in range(rng.randint(0, 4)):
+        sentences.append(rng.choice(FILLERS))
+    return pattern, " ".join(sentences)
+
+
+def make_rows(count, seed=42, days=730):
+    """Yield (journal_row, spiral_row) tuples with timestamps spread over `days`"""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / max(count, 1)
+    for i in range(count):
+        ts = start + step * i + timedelta(minutes=rng.randint(0, 59))
+        pattern, text = make_entry_text(rng)
+        spiral_level = min(max(int(rng.gauss(5, 2)), 1), 10)
+        emotion = rng.choice(EMOTIONS)
+        vector = {e: (1.0 if e == emotion else round(rng.random() * 0.5, 2)) for e in EMOTIONS}
+        response_type = rng.choice(RESPONSE_TYPES)
+        yield (
+            (ts.strftime("%Y-%m-%d %H:%M"), text, rng.choice(MOODS), spiral_level,
+             pattern, str(vector), response_type),
+            (ts.isoformat(timespec="seconds"), text, emotion, spiral_level, response_type),
+        )
+
+
+def create_databases(out_dir, count, seed=42, batch_size=10_000):
+    """Write user_journal.db and spiral_memory.db with `count` rows each into out_dir"""
+    os.makedirs(out_dir, exist_ok=True)
+    journal_path = os.path.join(out_dir, "user_journal.db")
+    spiral_path = os.path.join(out_dir, "spiral_memory.db")
+    for path in (journal_path, spiral_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    journal = sqlite3.connect(journal_path)
+    journal.execute("""
+        CREATE TABLE journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            input_text TEXT,
+            mood TEXT,
+            spiral_level INTEGER,
+            pattern TEXT,
+            emotion TEXT,
+            response_type TEXT
+        )
+    """)
+    spiral = sqlite3.connect(spiral_path)
+    spiral.execute("""
+        CREATE TABLE spiral_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            text TEXT,
+            detected_emotion TEXT,
+            spiral_level INTEGER,
+            response_type TEXT
+        )
+    """)
+
+    journal_batch, spiral_batch = [], []
+    for journal_row, spiral_row in make_rows(count, seed):
+        journal_batch.append(journal_row)
+        spiral_batch.append(spiral_row)
+        if len(journal_batch) >= batch_size:
+            _flush(journal, spiral, journal_batch, spiral_batch)
+    _flush(journal, spiral, journal_batch, spiral_batch)
+    journal.close()
+    spiral.close()
+    return journal_path, spiral_path
+
+
+def _flush(journal, spiral, journal_batch, spiral_batch):
+    journal.executemany("""
+        INSERT INTO journal (timestamp, input_text, mood, spiral_level, pattern, emotion, response_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, journal_batch)
+    spiral.executemany("""
+        INSERT INTO spiral_logs (timestamp, text, detected_emotion, spiral_level, response_type)
+        VALUES (?, ?, ?, ?, ?)
+    """, spiral_batch)
+    journal.commit()
+    spiral.commit()
+    journal_batch.clear()
+    spiral_batch.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Overthinking Buddy databases")
+    parser.add_argument("--entries", default="1k", help="1k, 100k, 1m or a plain number")
+    parser.add_argument("--out", default=".bench_data/synthetic", help="Output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    count = parse_size(args.entries)
+    paths = create_databases(args.out, count, args.seed)
+    print(f"Wrote {count} entries to {', '.join(paths)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,19 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
+import os
 import sqlite3
+import threading
 import calendar
 from utils.style_utils import inject_global_styles
+from utils import tracing
+from utils.tracing import traced
 inject_global_styles()
 
+JOURNAL_DB = "user_journal.db"
+# How often an open dashboard checks SQLite for new entries (seconds, 0 = never)
+REFRESH_SECONDS = float(os.environ.get("BUDDY_TRENDS_REFRESH", "2"))
+
 # Page config
 st.set_page_config(
     page_title="Your Spiral Trends",
@@ -62,11 +70,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_journal_data():
-    """Load journal data from SQLite database"""
-    conn = sqlite3.connect("user_journal.db")
-    query = "SELECT timestamp, spiral_level, mood, pattern, emotion FROM journal"
-    df = pd.read_sql(query, conn)
+@traced("trends.load_journal_data")
+def load_journal_data(since_rowid=0, db_path=JOURNAL_DB):
+    """Load journal data from SQLite database (only rows after since_rowid when given)"""
+    conn = sqlite3.connect(db_path)
+    # rowid, not id: older journal tables were created without an id column
+    query = ("SELECT rowid AS row_id, timestamp, spiral_level, mood, pattern, emotion FROM journal "
+             "WHERE rowid > ? ORDER BY rowid")
+    df = pd.read_sql(query, conn, params=(since_rowid,))
     conn.close()
     
     if not df.empty:
@@ -78,12 +89,168 @@ def load_journal_data():
         df['week'] = df['timestamp'].dt.isocalendar().week
     return df
 
-def create_trend_plots(df):
-    """Create all visualization plots"""
-    if df.empty:
+def _calendar_order_weekly(weekly_df):
+    # Ensure all days are present
+    days_order = list(calendar.day_name)
+    weekly_df['day_of_week'] = pd.Categorical(weekly_df['day_of_week'], categories=days_order, ordered=True)
+    return weekly_df.sort_values(['day_of_week', 'hour'])
+
+def _calendar_order_monthly(monthly_df):
+    months_order = list(calendar.month_name)[1:]
+    monthly_df['month'] = pd.Categorical(monthly_df['month'], categories=months_order, ordered=True)
+    return monthly_df.sort_values('month')
+
+def _display_patterns(counts):
+    pattern_df = counts.reset_index()
+    pattern_df.columns = ['pattern', 'count']
+    pattern_df['pattern'] = pattern_df['pattern'].str.replace('_', ' ').str.title()
+    return pattern_df
+
+def _add(total, new):
+    return new if total is None else total.add(new, fill_value=0)
+
+def _count(counts, values):
+    # value_counts(sort=False) lists values by first appearance, so the dict keeps journal order
+    for value, n in values.value_counts(sort=False).items():
+        counts[value] = counts.get(value, 0) + int(n)
+
+def _ranked(counts):
+    # A stable sort over first-appearance order breaks ties the way value_counts() does
+    return pd.Series(counts, dtype='int64').sort_values(ascending=False, kind='stable')
+
+def _mode(counts):
+    # Same tie-break as Series.mode()[0]: the smallest of the most frequent values
+    return min(counts[counts == counts.max()].index) if counts is not None and len(counts) else "N/A"
+
+class TrendTotals:
+    """Running sums and counts behind every chart and insight.
+
+    add() folds in new rows only, so the cost of an update depends on how many
+    entries arrived, not on the size of the journal. aggregates() turns the
+    totals into the chart frames, with the values and tie order a groupby and
+    value_counts() over the whole table would give.
+    """
+
+    def __init__(self):
+        self.entries = 0
+        self.spiral_sum = 0.0
+        self.by_slot = self.by_day = self.by_hour = self.by_month = None  # sum and count per group
+        self.moods, self.patterns = {}, {}  # count per value, in order of first appearance
+
+    def add(self, rows):
+        if rows.empty:
+            return
+        self.entries += len(rows)
+        self.spiral_sum += float(rows['spiral_level'].sum())
+        spiral = rows['spiral_level']
+        self.by_slot = _add(self.by_slot, spiral.groupby([rows['day_of_week'], rows['hour']]).agg(['sum', 'count']))
+        self.by_day = _add(self.by_day, spiral.groupby(rows['day_of_week']).agg(['sum', 'count']))
+        self.by_hour = _add(self.by_hour, spiral.groupby(rows['hour']).agg(['sum', 'count']))
+        self.by_month = _add(self.by_month, spiral.groupby(rows['month']).agg(['sum', 'count']))
+        _count(self.moods, rows['mood'])
+        _count(self.patterns, rows['pattern'])
+
+    def aggregates(self):
+        if not self.entries:
+            return {}
+        mean = lambda totals: (totals['sum'] / totals['count']).sort_index()
+        moods = _ranked(self.moods)
+        patterns = _ranked(self.patterns)
+        avg_spiral = self.spiral_sum / self.entries
+        return {
+            "overview": {
+                "entries": self.entries,
+                "avg_spiral": avg_spiral,
+                "common_mood": _mode(moods),
+                "common_pattern": _mode(patterns),
+            },
+            "weekly": _calendar_order_weekly(mean(self.by_slot).rename('spiral_level').reset_index()),
+            "monthly": _calendar_order_monthly(mean(self.by_month).rename('spiral_level').reset_index()),
+            "moods": moods.rename_axis('mood').reset_index(name='count'),
+            "patterns": _display_patterns(patterns),
+            "insights": {
+                "avg_spiral": avg_spiral,
+                "worst_day": mean(self.by_day).idxmax(),
+                "worst_hour": mean(self.by_hour).idxmax(),
+                "common_pattern": _mode(patterns).replace('_', ' '),
+            },
+        }
+
+class JournalFeed:
+    """Running journal aggregates that only read what changed.
+
+    A persistent connection polls PRAGMA data_version, which moves whenever
+    another connection commits to the file, so an idle check is one cheap
+    pragma. On a change only rows with a higher rowid are read and folded into
+    the running totals; the chart frames are rebuilt from those totals once
+    per change.
+    """
+
+    def __init__(self, db_path=JOURNAL_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.data_version = None
+        self.totals = None
+        self.last_rowid = 0
+        self.revision = 0
+        self._aggregates = None
+        self._aggregates_revision = -1
+
+    @traced("trends.refresh")
+    def refresh(self):
+        """Pick up new entries; returns True when the totals changed"""
+        with self.lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if self.totals is not None and version == self.data_version:
+                return False
+            self.data_version = version
+            max_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM journal").fetchone()[0]
+            if self.totals is not None and max_rowid == self.last_rowid:
+                return False  # the commit touched another table (spiral state, signatures)
+
+            if self.totals is None or max_rowid < self.last_rowid:
+                self.totals = TrendTotals()  # first load, or rows were deleted
+                self.last_rowid = 0
+            new_rows = load_journal_data(self.last_rowid, self.db_path)
+            self.totals.add(new_rows)
+            if not new_rows.empty:
+                self.last_rowid = int(new_rows['row_id'].max())
+            self.revision += 1
+            return True
+
+    def aggregates(self):
+        """Chart frames and insights for the current totals, rebuilt only after a change"""
+        with self.lock:
+            if self._aggregates_revision != self.revision:
+                self._aggregates = self.totals.aggregates()
+                self._aggregates_revision = self.revision
+            return self._aggregates
+
+@st.cache_resource
+def get_journal_feed(db_path=JOURNAL_DB):
+    """One feed per server process, shared by every open dashboard"""
+    return JournalFeed(db_path)
+
+# A full rerun rather than one fragment per chart: every new entry moves the
+# entry count, its weekday/hour slot, its month, its mood and its pattern, so
+# all of the charts change together. Idle ticks only run this empty fragment.
+@st.fragment(run_every=REFRESH_SECONDS or None)
+def watch_for_new_entries(feed, rendered_revision):
+    """Rerun the page only when entries landed since it was drawn"""
+    feed.refresh()
+    if feed.revision != rendered_revision:
+        st.session_state.trends_auto_refresh = True
+        st.rerun()
+
+def create_trend_plots(aggregates):
+    """Create all visualization plots from JournalFeed.aggregates() output"""
+    if not aggregates:
         st.warning("No journal data available yet. Keep using the app to see your trends!")
         return
     
+    overview = aggregates["overview"]
+
     # Metrics row
     st.markdown("### 🌸 Your Spiral Overview")
     col1, col2, col3, col4 = st.columns(4)
@@ -91,25 +258,25 @@ def create_trend_plots(df):
     with col1:
         st.markdown('<div class="metric-card">'
                     f'<h3>📅 Total Entries</h3>'
-                    f'<h2>{len(df)}</h2>'
+                    f'<h2>{overview["entries"]}</h2>'
                     '</div>', unsafe_allow_html=True)
     
     with col2:
-        avg_spiral = df['spiral_level'].mean()
+        avg_spiral = overview["avg_spiral"]
         st.markdown('<div class="metric-card">'
                     f'<h3>🌀 Average Spiral</h3>'
                     f'<h2>{avg_spiral:.1f}/10</h2>'
                     '</div>', unsafe_allow_html=True)
     
     with col3:
-        common_mood = df['mood'].mode()[0] if not df['mood'].mode().empty else "N/A"
+        common_mood = overview["common_mood"]
         st.markdown('<div class="metric-card">'
                     f'<h3>🌈 Most Common Mood</h3>'
                     f'<h2>{common_mood}</h2>'
                     '</div>', unsafe_allow_html=True)
     
     with col4:
-        common_pattern = df['pattern'].mode()[0] if not df['pattern'].mode().empty else "N/A"
+        common_pattern = overview["common_pattern"]
         st.markdown('<div class="metric-card">'
                     f'<h3>🔄 Common Pattern</h3>'
                     f'<h2>{common_pattern.replace("_", " ").title()}</h2>'
@@ -118,12 +285,7 @@ def create_trend_plots(df):
     # Weekly trends
     st.markdown("---")
     st.markdown("### 📆 Weekly Patterns")
-    weekly_df = df.groupby(['day_of_week', 'hour']).agg({'spiral_level':'mean'}).reset_index()
-    
-    # Ensure all days are present
-    days_order = list(calendar.day_name)
-    weekly_df['day_of_week'] = pd.Categorical(weekly_df['day_of_week'], categories=days_order, ordered=True)
-    weekly_df = weekly_df.sort_values(['day_of_week', 'hour'])
+    weekly_df = aggregates["weekly"]
     
     fig = px.density_heatmap(
         weekly_df, 
@@ -147,10 +309,7 @@ def create_trend_plots(df):
     col1, col2 = st.columns(2)
     
     with col1:
-        monthly_df = df.groupby('month').agg({'spiral_level':'mean'}).reset_index()
-        months_order = list(calendar.month_name)[1:]
-        monthly_df['month'] = pd.Categorical(monthly_df['month'], categories=months_order, ordered=True)
-        monthly_df = monthly_df.sort_values('month')
+        monthly_df = aggregates["monthly"]
         
         fig = px.line(
             monthly_df, 
@@ -169,8 +328,7 @@ def create_trend_plots(df):
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        mood_counts = df['mood'].value_counts().reset_index()
-        mood_counts.columns = ['mood', 'count']
+        mood_counts = aggregates["moods"]
         
         fig = px.pie(
             mood_counts,
@@ -191,9 +349,7 @@ def create_trend_plots(df):
     # Pattern trends
     st.markdown("---")
     st.markdown("### 🔄 Your Thought Patterns")
-    pattern_df = df['pattern'].value_counts().reset_index()
-    pattern_df.columns = ['pattern', 'count']
-    pattern_df['pattern'] = pattern_df['pattern'].str.replace('_', ' ').str.title()
+    pattern_df = aggregates["patterns"]
     
     fig = px.bar(
         pattern_df,
@@ -224,29 +380,36 @@ def main():
     """, unsafe_allow_html=True)
     st.markdown("Visualizing your thought patterns to help you understand yourself better.")
     
-    df = load_journal_data()
-    create_trend_plots(df)
+    feed = get_journal_feed()
+    feed.refresh()
+    rendered_revision = feed.revision  # read before the totals, so a concurrent refresh only causes an extra rerun
+    aggregates = feed.aggregates()
+    create_trend_plots(aggregates)
     
     st.markdown("---")
     st.markdown("### 💡 Insights & Recommendations")
     
-    if not df.empty:
+    if aggregates:
         # Generate some insights
-        avg_spiral = df['spiral_level'].mean()
-        worst_day = df.groupby('day_of_week')['spiral_level'].mean().idxmax()
-        worst_hour = df.groupby('hour')['spiral_level'].mean().idxmax()
-        common_pattern = df['pattern'].mode()[0].replace('_', ' ')
+        insights = aggregates["insights"]
         
         st.markdown(f"""
-        - 🌟 Your average spiral intensity is **{avg_spiral:.1f}/10**
-        - 📅 **{worst_day}s** tend to be your most challenging days
-        - 🕒 Around **{worst_hour}:00** is when you spiral most intensely
-        - 🔄 Your most common thought pattern is **{common_pattern}**
+        - 🌟 Your average spiral intensity is **{insights['avg_spiral']:.1f}/10**
+        - 📅 **{insights['worst_day']}s** tend to be your most challenging days
+        - 🕒 Around **{insights['worst_hour']}:00** is when you spiral most intensely
+        - 🔄 Your most common thought pattern is **{insights['common_pattern']}**
         
         *Consider planning self-care activities during these vulnerable times.*
         """)
     else:
         st.info("Keep using the app to generate personalized insights!")
+    
+    if REFRESH_SECONDS:
+        watch_for_new_entries(feed, rendered_revision)
+
+    # Automatic refreshes don't rewrite the metrics file; user-driven runs do
+    if tracing.is_enabled() and not st.session_state.pop("trends_auto_refresh", False):
+        tracing.write_metrics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
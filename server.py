@@ -0,0 +1,204 @@
+"""Headless HTTP front end for the analysis engine.
+
+    python server.py --port 8765 --workers 4
+
+    POST /analyze        {"text": "...", "response_type": "validation", "user_id": "optional"}
+    POST /analyze_many   {"texts": ["...", "..."], "response_type": "humor"}
+    GET  /health
+
+Requests are parsed on a single asyncio loop and the analysis runs in a pool
+of worker processes, each holding its own classifier.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import analysis, model_store
+from utils.near_duplicates import NearDuplicateIndex
+
+logger = logging.getLogger("buddy.server")
+
+MAX_BODY_BYTES = 1024 * 1024
+RESPONSE_TYPES = {"validation", "tough_love", "humor", "distraction", "mirror_me"}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Per-worker state, set by _init_worker
+_classifier = None
+_near_duplicates = None
+
+
+def _init_worker(use_model, model_dir, threads, dedup_db, backend=None):
+    global _classifier, _near_duplicates
+    if dedup_db:
+        _near_duplicates = NearDuplicateIndex(dedup_db)
+    if not use_model:
+        return
+    try:
+        _classifier = analysis.load_classifier(model_dir, threads, backend)
+    except Exception:
+        logger.exception("Model loading failed, worker will use keyword fallback")
+        _classifier = None
+
+
+def _analyze(text, response_type, user_id):
+    return analysis.analyze(text, _classifier, response_type,
+                            near_duplicates=_near_duplicates, user_id=user_id)
+
+
+def _analyze_many(texts, response_type):
+    return analysis.analyze_many(texts, _classifier, response_type)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class BuddyServer:
+    def __init__(self, workers, use_model=True, model_dir=None, threads=None, dedup_db=None, backend=None):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(use_model, model_dir, threads, dedup_db, backend)
+        )
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = 200, await self.route(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception:
+                    logger.exception("Request failed")
+                    status, payload = 500, {"error": "Internal server error"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except HTTPError as e:
+            await self._write_response(writer, e.status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        loop = asyncio.get_running_loop()
+        if path == "/health":
+            return {"status": "ok", "workers": self.workers}
+        if path not in ("/analyze", "/analyze_many"):
+            raise HTTPError(404, f"Unknown path: {path}")
+        if method != "POST":
+            raise HTTPError(405, "Use POST")
+
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        response_type = data.get("response_type", "validation")
+        if response_type not in RESPONSE_TYPES:
+            raise HTTPError(400, f"response_type must be one of {sorted(RESPONSE_TYPES)}")
+
+        if path == "/analyze":
+            text = data.get("text")
+            if not isinstance(text, str) or not text.strip():
+                raise HTTPError(400, "'text' must be a non-empty string")
+            user_id = str(data.get("user_id", "local"))
+            return await loop.run_in_executor(self.pool, _analyze, text, response_type, user_id)
+
+        texts = data.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(t, str) and t.strip() for t in texts):
+            raise HTTPError(400, "'texts' must be a list of non-empty strings")
+        return {"results": await loop.run_in_executor(self.pool, _analyze_many, texts, response_type)}
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length must be an integer")
+        if length < 0:
+            raise HTTPError(400, "Content-Length must not be negative")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info("Overthinking Buddy engine listening on http://%s:%s", host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Overthinking Buddy analysis engine over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--no-model", action="store_true", help="Use the keyword fallback only")
+    parser.add_argument("--model-dir", default=None,
+                        help="Exported safetensors model to memory-map and share between workers")
+    parser.add_argument("--backend", choices=["zero-shot", "fast"], default=None,
+                        help="Classifier backend (default: BUDDY_PATTERN_BACKEND or zero-shot)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--dedup-db", default=None,
+                        help="SQLite file for the near-duplicate index (reuses results for looped thoughts)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    analysis.ensure_corpora()  # once here, so workers don't race on the download
+    threads = args.threads or model_store.default_thread_count(args.workers)
+    buddy = BuddyServer(args.workers, use_model=not args.no_model, model_dir=args.model_dir, threads=threads,
+                        dedup_db=args.dedup_db, backend=args.backend)
+    try:
+        asyncio.run(buddy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        buddy.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,644 @@
+# utils/analysis.py
+"""Streamlit-free analysis pipeline.
+
+Everything here works on plain values so it can run inside the Streamlit app,
+the HTTP server in server.py, benchmarks or a notebook. Problems are reported
+through the optional `on_error` callback (the app passes st.warning) and the
+module logger instead of UI calls.
+"""
+import functools
+import logging
+import os
+import random
+import re
+import threading
+from collections import Counter
+
+from textblob import TextBlob
+
+from utils.response_catalog import ResponseCatalog
+from utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "typeform/distilbert-base-uncased-mnli"
+PATTERN_LABELS = [
+    "catastrophic thinking",
+    "rumination",
+    "self-doubt",
+    "anxiety spiral",
+    "decision paralysis",
+    "normal reflection"
+]
+EMOTION_LABELS = ["fear", "anger", "sadness", "joy", "love", "surprise", "anxiety"]
+# Cascade keywords per EMOTION_LABELS label; guilt words count as sadness, the closest model label
+EMOTION_KEYWORDS = {
+    "joy": ["happy", "excited", "grateful", "smile", "laugh"],
+    "love": ["love", "adore", "cherish"],
+    "sadness": ["sad", "lonely", "cry", "miss", "empty", "sorry", "regret", "guilty", "ashamed"],
+    "anger": ["angry", "mad", "hate", "annoyed", "frustrated"],
+    "fear": ["scared", "fear", "afraid", "terrified"],
+    "anxiety": ["worried", "anxious", "panic", "nervous"],
+    "surprise": ["surprised", "shocked", "unexpected"],
+}
+EMOTION_PRIOR = 0.5
+OVERTHINKING_KEYWORDS = {
+    "catastrophic thinking": ["worst", "disaster", "terrible", "awful", "horrible"],
+    "rumination": ["over and over", "can't stop thinking", "keep thinking"],
+    "self-doubt": ["not good enough", "can't do this", "failure", "stupid"],
+    "anxiety spiral": ["what if", "anxious", "nervous", "scared", "panic"],
+    "decision paralysis": ["can't decide", "don't know", "what should", "which one"]
+}
+
+# Cascade mode: skip the transformer when the keyword heuristics are clear enough.
+# Unset means every entry goes to the model.
+_cascade_env = os.environ.get("BUDDY_CASCADE_THRESHOLD")
+CASCADE_THRESHOLD = float(_cascade_env) if _cascade_env else None
+CASCADE_SHADOW_RATE = float(os.environ.get("BUDDY_CASCADE_SHADOW_RATE", "0.1"))
+
+# Long-text mode: entries longer than one window are split instead of being
+# silently truncated by the model. The NLI hypothesis takes ~10 of DistilBERT's
+# 512 tokens, so windows stay well under that.
+LONG_TEXT_MODE = os.environ.get("BUDDY_LONG_TEXT", "1") != "0"
+WINDOW_TOKENS = 384
+WINDOW_OVERLAP_SENTENCES = 1
+MAX_WINDOWS = 8
+# Largest pipeline batch, in (sequence, label) pairs
+MAX_BATCH_PAIRS = 64
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+_WORD = re.compile(r"[a-z']+")
+
+# "zero-shot" runs the MNLI model; "fast" serves the distilled model from utils/fast_classifier.py;
+# "keywords" loads no model at all, so every caller uses the keyword heuristics
+PATTERN_BACKEND = os.environ.get("BUDDY_PATTERN_BACKEND", "zero-shot")
+
+_catalog = None
+
+
+def ensure_corpora():
+    """Make sure the NLTK data TextBlob relies on is available"""
+    import nltk
+    from textblob import download_corpora
+    try:
+        download_corpora.download_all()
+    except:
+        nltk.download('punkt')
+        nltk.download('averaged_perceptron_tagger')
+        nltk.download('brown')
+
+
+@traced("model_load")
+def load_classifier(model_dir=None, intra_op_threads=None, backend=None):
+    """Build the classifier (raises if the model can't be loaded).
+
+    backend (default BUDDY_PATTERN_BACKEND) picks the zero-shot model, the
+    distilled fast model or "keywords" (returns None). With model_dir (or BUDDY_MODEL_DIR) set, zero-shot
+    weights are memory-mapped from an exported safetensors file so worker
+    processes share them.
+    """
+    backend = backend or PATTERN_BACKEND
+    if backend == "keywords":
+        return None
+    if backend == "fast":
+        from utils import fast_classifier
+        return fast_classifier.load()
+    if backend != "zero-shot":
+        raise ValueError(f"Unknown classifier backend: {backend}")
+
+    from utils import model_store
+    model_store.configure_threads(intra_op_threads)
+    model_dir = model_dir or os.environ.get("BUDDY_MODEL_DIR")
+    if model_dir:
+        return model_store.load_shared_classifier(model_dir)
+
+    from transformers import pipeline
+    return pipeline(
+        "zero-shot-classification",
+        model=MODEL_NAME,
+        device=-1  # Use CPU
+    )
+
+
+def get_response_catalog():
+    """Process-wide response catalog, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ResponseCatalog()
+    return _catalog
+
+
+def _report(on_error, message):
+    logger.warning(message)
+    if on_error is not None:
+        on_error(message)
+
+
+def simple_pattern_detection(text):
+    """Fallback pattern detection when models fail"""
+    text_lower = text.lower()
+    for pattern, keywords in OVERTHINKING_KEYWORDS.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return pattern, 0.8  # Medium confidence
+
+    return "normal reflection", 0.5
+
+
+def _token_counter(classifier):
+    tokenizer = getattr(classifier, "tokenizer", None)
+    if tokenizer is None:
+        return lambda chunk: len(chunk) // 4 + 1  # ~4 characters per token
+    return lambda chunk: len(tokenizer.tokenize(chunk))
+
+
+def split_windows(text, count_tokens=None, window_tokens=WINDOW_TOKENS,
+                  overlap_sentences=WINDOW_OVERLAP_SENTENCES):
+    """Split text into sentence-aligned windows of at most window_tokens.
+
+    Consecutive windows share their last/first `overlap_sentences` sentences so
+    a thought that straddles a boundary is seen whole at least once. A single
+    sentence longer than a window is cut on word boundaries. Every sentence is
+    tokenized once and window sizes are sums of those counts.
+    """
+    count_tokens = count_tokens or (lambda chunk: len(chunk) // 4 + 1)
+    sentences = []  # (sentence, tokens)
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence)
+        if tokens <= window_tokens:
+            sentences.append((sentence, tokens))
+            continue
+        piece, piece_tokens = [], 0
+        for word in sentence.split():
+            word_tokens = count_tokens(word)
+            if piece and piece_tokens + word_tokens > window_tokens:
+                sentences.append((" ".join(piece), piece_tokens))
+                piece, piece_tokens = [], 0
+            piece.append(word)
+            piece_tokens += word_tokens
+        if piece:
+            sentences.append((" ".join(piece), piece_tokens))
+
+    windows, current = [], []
+    for sentence in sentences:
+        if current and sum(t for _, t in current) + sentence[1] > window_tokens:
+            windows.append(" ".join(s for s, _ in current))
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            if current and sum(t for _, t in current) + sentence[1] > window_tokens:
+                current = []
+        current.append(sentence)
+    if current:
+        windows.append(" ".join(s for s, _ in current))
+    return windows
+
+
+def cap_windows(windows, max_windows=MAX_WINDOWS):
+    """Keep at most max_windows, spread evenly and always keeping the first and last"""
+    if len(windows) <= max_windows:
+        return windows
+    if max_windows == 1:
+        return windows[:1]
+    step = (len(windows) - 1) / (max_windows - 1)
+    return [windows[round(i * step)] for i in range(max_windows)]
+
+
+@functools.lru_cache(maxsize=32)
+def _entry_windows(text, classifier):
+    """Capped windows for a long entry, or None when it fits in one pass.
+
+    Cached so the pattern and emotion calls for the same entry share one
+    tokenization pass.
+    """
+    if not LONG_TEXT_MODE or getattr(classifier, "handles_long_text", False):
+        return None
+    windows = cap_windows(split_windows(text, _token_counter(classifier)))
+    return tuple(windows) if len(windows) > 1 else None
+
+
+def _run_classifier(classifier, sequences, labels):
+    """One pipeline call over a list of sequences, batched for real.
+
+    The pipeline's batch_size defaults to 1 (one forward pass per sequence and
+    label), so it is set to cover all the (sequence, label) pairs, up to
+    MAX_BATCH_PAIRS.
+    """
+    batch_size = max(1, min(len(sequences) * len(labels), MAX_BATCH_PAIRS))
+    results = classifier(list(sequences), candidate_labels=labels, batch_size=batch_size)
+    return [results] if isinstance(results, dict) else results
+
+
+def _merge_windows(text, windows, results, labels):
+    """Length-weighted mean of per-window label scores"""
+    totals = dict.fromkeys(labels, 0.0)
+    weight_sum = 0
+    for window, result in zip(windows, results):
+        weight = len(window)
+        weight_sum += weight
+        for label, score in zip(result['labels'], result['scores']):
+            totals[label] += score * weight
+    ranked = sorted(((label, total / weight_sum) for label, total in totals.items()),
+                    key=lambda item: item[1], reverse=True)
+    return {
+        "sequence": text,
+        "labels": [label for label, _ in ranked],
+        "scores": [score for _, score in ranked],
+        "windows": len(windows),
+    }
+
+
+def classify_long_text(text, classifier, labels, max_windows=MAX_WINDOWS, windows=None):
+    """Zero-shot classify a long entry window by window, in one batch.
+
+    Aggregation rule: each window's label scores are weighted by the window's
+    length in characters and averaged, so the result is still a distribution
+    over the labels and every part of the entry counts in proportion to how
+    much of it there is. Compute is capped at max_windows windows per label
+    set, sent to the model as a single batch.
+    Returns the same {'labels', 'scores'} shape as the pipeline.
+    """
+    if windows is None:
+        windows = cap_windows(split_windows(text, _token_counter(classifier)), max_windows)
+    if len(windows) <= 1:
+        return classifier(windows[0] if windows else text, candidate_labels=labels)
+    return _merge_windows(text, windows, _run_classifier(classifier, windows, labels), labels)
+
+
+def _classify(text, classifier, labels):
+    """One classifier call, switching to windowed analysis for long entries"""
+    windows = _entry_windows(text, classifier)
+    if windows:
+        return classify_long_text(text, classifier, labels, windows=windows)
+    return classifier(text, candidate_labels=labels)
+
+
+def _classify_batch(texts, classifier, labels):
+    """Classify many entries in one batched call; long entries contribute their windows"""
+    entry_windows = [_entry_windows(text, classifier) for text in texts]
+    sequences = [seq for text, windows in zip(texts, entry_windows) for seq in (windows or [text])]
+    results = _run_classifier(classifier, sequences, labels)
+    merged, pos = [], 0
+    for text, windows in zip(texts, entry_windows):
+        if windows:
+            merged.append(_merge_windows(text, windows, results[pos:pos + len(windows)], labels))
+            pos += len(windows)
+        else:
+            merged.append(results[pos])
+            pos += 1
+    return merged
+
+
+@traced("pattern_classification")
+def detect_overthinking_pattern(text, classifier, on_error=None):
+    """Detect overthinking patterns using the classifier"""
+    if classifier is None:
+        return simple_pattern_detection(text)
+
+    try:
+        result = _classify(text, classifier, PATTERN_LABELS)
+        return result['labels'][0], result['scores'][0]
+    except Exception as e:
+        _report(on_error, f"Pattern detection failed: {str(e)}")
+        return simple_pattern_detection(text)
+
+
+@traced("emotion_classification")
+def detect_dominant_emotion(text, classifier):
+    """Detect the dominant emotional tone using the classifier"""
+    try:
+        emotion_result = _classify(text, classifier, EMOTION_LABELS)
+        return emotion_result['labels'][0], emotion_result['scores'][0]
+    except:
+        return "emotion", 0
+
+
+def get_spiral_level(text, pattern):
+    """Calculate overthinking intensity (1-10)"""
+    negative_words = ['worried', 'anxious', 'scared', 'terrible', 'awful', 'hate', 'stupid']
+    questions = text.count('?')
+    negative_count = sum(1 for word in negative_words if word in text.lower())
+
+    base_score = min(len(text) // 50, 5)
+    question_score = min(questions * 1.5, 3)
+    negative_score = min(negative_count * 0.5, 2)
+
+    total = int(base_score + question_score + negative_score)
+    return min(max(total, 1), 10)
+
+
+def get_mood_emoji(text):
+    """Simple mood detection"""
+    positive_words = ['happy', 'joy', 'excited', 'good', 'great', 'love']
+    negative_words = ['sad', 'angry', 'hate', 'awful', 'terrible']
+
+    if any(word in text.lower() for word in positive_words):
+        return random.choice(["🌈 Hopeful", "✨ Excited", "🌸 Peaceful"])
+    elif any(word in text.lower() for word in negative_words):
+        return random.choice(["🌀 Anxious", "🌧️ Sad", "🌪️ Overwhelmed"])
+    else:
+        return random.choice(["🌼 Neutral", "🌿 Contemplative", "☁️ Pensive"])
+
+
+@traced("textblob_emotion_vector")
+def get_emotion_vector(text):
+    emotion_vector = {
+        "joy": 0.0,
+        "sadness": 0.0,
+        "anger": 0.0,
+        "fear": 0.0,
+        "guilt": 0.0
+    }
+
+    blob = TextBlob(text.lower())
+    polarity = blob.sentiment.polarity
+    words = blob.words
+
+    # Heuristic: keywords + sentiment
+    if any(word in words for word in ["happy", "excited", "love", "grateful", "smile", "laugh"]):
+        emotion_vector["joy"] += 0.5 + max(polarity, 0)
+    if any(word in words for word in ["sad", "lonely", "cry", "miss", "empty"]):
+        emotion_vector["sadness"] += 0.5 - min(polarity, 0)
+    if any(word in words for word in ["angry", "mad", "hate", "annoyed", "frustrated"]):
+        emotion_vector["anger"] += 0.6
+    if any(word in words for word in ["worried", "anxious", "scared", "panic", "fear"]):
+        emotion_vector["fear"] += 0.6
+    if any(word in words for word in ["sorry", "regret", "guilty", "ashamed"]):
+        emotion_vector["guilt"] += 0.7
+
+    # Normalize to 0-1
+    max_val = max(emotion_vector.values()) or 1
+    for key in emotion_vector:
+        emotion_vector[key] = round(emotion_vector[key] / max_val, 2)
+
+    return emotion_vector
+
+
+def heuristic_pattern_scores(text):
+    """Keyword-vote scores per pattern.
+
+    Each distinct trigger phrase is one vote for its pattern and "normal
+    reflection" gets half a vote as a prior, so one clear trigger scores
+    0.67 vs 0.33. With no triggers at all the result is an empty dict: the
+    heuristic has no opinion and the cascade must ask the model.
+    """
+    text_lower = text.lower()
+    votes = {
+        pattern: sum(1 for keyword in keywords if keyword in text_lower)
+        for pattern, keywords in OVERTHINKING_KEYWORDS.items()
+    }
+    total = sum(votes.values())
+    if not total:
+        return {}
+    votes["normal reflection"] = 0.5
+    return {pattern: n / (total + 0.5) for pattern, n in votes.items() if n}
+
+
+def heuristic_emotion_scores(text):
+    """Keyword-vote scores over EMOTION_LABELS, on the same scale as heuristic_pattern_scores.
+
+    Each distinct keyword is one vote and "no clear emotion" gets half a vote
+    (stored under None, so it can be the runner-up but never the answer): one
+    keyword scores 0.67 vs 0.33, two agreeing ones 0.8 vs 0.2, and conflicting
+    keywords leave little or no margin. No keywords gives an empty dict.
+    """
+    words = set(_WORD.findall(text.lower()))
+    votes = {
+        label: sum(1 for keyword in keywords if keyword in words)
+        for label, keywords in EMOTION_KEYWORDS.items()
+    }
+    total = sum(votes.values())
+    if not total:
+        return {}
+    scores = {label: n / (total + EMOTION_PRIOR) for label, n in votes.items() if n}
+    scores[None] = EMOTION_PRIOR / (total + EMOTION_PRIOR)
+    return scores
+
+
+def score_margin(scores):
+    """(top label, top score, gap to the runner-up) for a label->score dict"""
+    if not scores:
+        return None, 0.0, 0.0
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    return ranked[0][0], ranked[0][1], ranked[0][1] - runner_up
+
+
+class CascadeStats:
+    """Counts how the cascade routed entries and how often it matched the model.
+
+    Model-routed entries agree with model-only output by definition; for
+    heuristic-routed ones a random `shadow_rate` share also runs the model so
+    the agreement can be estimated without paying for every entry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.routed = Counter()     # (task, tier) -> entries
+        self.shadowed = Counter()   # task -> heuristic entries also checked by the model
+        self.agreed = Counter()     # task -> of those, how many matched
+
+    def record_route(self, task, tier):
+        with self._lock:
+            self.routed[(task, tier)] += 1
+
+    def record_shadow(self, task, agreed):
+        with self._lock:
+            self.shadowed[task] += 1
+            self.agreed[task] += int(agreed)
+
+    def report(self):
+        with self._lock:
+            report = {}
+            for task in ("pattern", "emotion"):
+                heuristic = self.routed[(task, "heuristic")]
+                model = self.routed[(task, "model")]
+                total = heuristic + model
+                if not total:
+                    continue
+                shadow_agreement = self.agreed[task] / self.shadowed[task] if self.shadowed[task] else None
+                estimated = None
+                if shadow_agreement is not None or not heuristic:
+                    estimated = (model + heuristic * (shadow_agreement or 0)) / total
+                report[task] = {
+                    "entries": total,
+                    "heuristic_share": round(heuristic / total, 3),
+                    "model_share": round(model / total, 3),
+                    "shadow_checked": self.shadowed[task],
+                    "heuristic_agreement": None if shadow_agreement is None else round(shadow_agreement, 3),
+                    "estimated_agreement": None if estimated is None else round(estimated, 3),
+                }
+            return report
+
+
+cascade_stats = CascadeStats()
+
+
+def cascade_pattern(text, classifier, threshold=CASCADE_THRESHOLD, on_error=None,
+                    shadow_rate=CASCADE_SHADOW_RATE):
+    """Pattern via the cheapest tier that is confident enough.
+
+    Returns (pattern, confidence, tier). The keyword heuristic answers when its
+    margin over the runner-up is at least `threshold`; otherwise, or when
+    threshold is None, the zero-shot model does.
+    """
+    label, score, margin = score_margin(heuristic_pattern_scores(text))
+    if classifier is None or (threshold is not None and label and margin >= threshold):
+        if classifier is not None:  # without a model there is no routing to report
+            cascade_stats.record_route("pattern", "heuristic")
+            if random.random() < shadow_rate:
+                model_label, _ = detect_overthinking_pattern(text, classifier, on_error)
+                cascade_stats.record_shadow("pattern", model_label == label)
+        if label is None:
+            return simple_pattern_detection(text) + ("heuristic",)
+        return label, score, "heuristic"
+
+    cascade_stats.record_route("pattern", "model")
+    return detect_overthinking_pattern(text, classifier, on_error) + ("model",)
+
+
+def cascade_emotion(text, classifier, threshold=CASCADE_THRESHOLD, shadow_rate=CASCADE_SHADOW_RATE):
+    """Dominant emotion via the emotion keyword votes when they are clear enough.
+
+    Uses heuristic_emotion_scores, whose labels are the model's own, so the
+    margin means the same as for patterns and shadow checks compare like with
+    like. Returns (emotion, confidence, tier).
+    """
+    label, score, margin = score_margin(heuristic_emotion_scores(text))
+    if classifier is None or (threshold is not None and label and margin >= threshold):
+        if classifier is not None:  # without a model there is no routing to report
+            cascade_stats.record_route("emotion", "heuristic")
+            if random.random() < shadow_rate:
+                model_label, _ = detect_dominant_emotion(text, classifier)
+                cascade_stats.record_shadow("emotion", model_label == label)
+        return label or "emotion", score, "heuristic"
+
+    cascade_stats.record_route("emotion", "model")
+    return detect_dominant_emotion(text, classifier) + ("model",)
+
+
+def get_heuristic_emotion(emotion_vector):
+    """Pick a provisional emotion from the keyword emotion vector"""
+    emotion, score = max(emotion_vector.items(), key=lambda item: item[1])
+    return emotion if score > 0 else "emotion"
+
+
+def get_preferred_response_type(history):
+    # "mirror_me" entries say nothing about a concrete tone, and resolving to it would loop
+    types = [entry['response_type'] for entry in history if entry['response_type'] != "mirror_me"]
+    if not types:
+        return "validation"  # fallback
+    counter = Counter(types)
+    return counter.most_common(1)[0][0]
+
+
+def get_personality_type(pattern_history):
+    """Determine overthinking personality type"""
+    if not pattern_history:
+        return "The New Overthinker"
+
+    pattern_counts = {}
+    for pattern in pattern_history:
+        pattern_counts[pattern] = pattern_counts.get(pattern, 0) + 1
+
+    dominant_pattern = max(pattern_counts, key=pattern_counts.get)
+
+    types = {
+        "catastrophic thinking": "The Catastrophizer",
+        "rumination": "The Retrospective Overanalyzer",
+        "self-doubt": "The Self-Doubt Ninja",
+        "anxiety spiral": "The Spiral Queen",
+        "decision paralysis": "The Indecisive Icon",
+        "normal reflection": "The Balanced Thinker"
+    }
+
+    return types.get(dominant_pattern, "The Overthinker")
+
+
+def generate_buddy_response(text, pattern, response_type, spiral_level, classifier,
+                            dominant_emotion=None, variant=None, history=None):
+    """Generate more personalized responses using ML"""
+    if response_type == "mirror_me":
+        response_type = get_preferred_response_type(history or [])
+    # Get emotional tone (callers that already know it can pass it in)
+    if dominant_emotion is None:
+        dominant_emotion, emotion_confidence = detect_dominant_emotion(text, classifier)
+
+    intensity = "high" if spiral_level >= 6 else "low"
+    # A fixed variant keeps the wording stable when the emotion is refined later
+    return get_response_catalog().render(response_type, intensity, dominant_emotion, variant)
+
+
+def _build_result(text, pattern, confidence, emotion, emotion_confidence, response_type, history):
+    spiral_level = get_spiral_level(text, pattern)
+    resolved_type = get_preferred_response_type(history or []) if response_type == "mirror_me" else response_type
+    return {
+        "input": text,
+        "pattern": pattern,
+        "confidence": float(confidence),
+        "spiral_level": spiral_level,
+        "mood": get_mood_emoji(text),
+        "emotion": emotion,
+        "emotion_confidence": float(emotion_confidence),
+        "emotion_vector": get_emotion_vector(text),
+        "response_type": resolved_type,
+        "response": generate_buddy_response(text, pattern, resolved_type, spiral_level, None,
+                                            dominant_emotion=emotion),
+        "loop_count": 0,
+        "reused": False,
+    }
+
+
+def analyze(text, classifier=None, response_type="validation", history=None, on_error=None,
+            near_duplicates=None, user_id="local", cascade_threshold=CASCADE_THRESHOLD):
+    """Run the full pipeline on one entry and return a plain dict.
+
+    Without a classifier the keyword heuristics are used for the pattern and
+    the emotion vector supplies the emotion. With a NearDuplicateIndex, a
+    recent near-identical entry's results are reused instead of classifying.
+    cascade_threshold (see cascade_pattern) lets clear-cut entries skip the model.
+    """
+    match, loop_count = near_duplicates.find(text, user_id) if near_duplicates else (None, 0)
+    if match:
+        pattern, confidence = match["pattern"], match["confidence"]
+        emotion, emotion_confidence = match["emotion"], match["emotion_confidence"]
+    elif cascade_threshold is not None:
+        pattern, confidence, _ = cascade_pattern(text, classifier, cascade_threshold, on_error)
+        emotion, emotion_confidence, _ = cascade_emotion(text, classifier, cascade_threshold)
+    else:
+        pattern, confidence = detect_overthinking_pattern(text, classifier, on_error)
+        if classifier is None:
+            emotion, emotion_confidence = get_heuristic_emotion(get_emotion_vector(text)), 0
+        else:
+            emotion, emotion_confidence = detect_dominant_emotion(text, classifier)
+
+    result = _build_result(text, pattern, confidence, emotion, emotion_confidence, response_type, history)
+    result["loop_count"] = loop_count
+    result["reused"] = match is not None
+    if near_duplicates is not None:
+        near_duplicates.add(text, pattern, confidence, emotion, emotion_confidence, user_id)
+    return result
+
+
+def analyze_many(texts, classifier=None, response_type="validation", history=None, on_error=None):
+    """Analyze several entries, batching the classifier calls"""
+    texts = list(texts)
+    if not texts:
+        return []
+    if classifier is None:
+        return [analyze(text, None, response_type, history, on_error) for text in texts]
+
+    try:
+        pattern_results = _classify_batch(texts, classifier, PATTERN_LABELS)
+        emotion_results = _classify_batch(texts, classifier, EMOTION_LABELS)
+    except Exception as e:
+        _report(on_error, f"Batch classification failed, analyzing one by one: {str(e)}")
+        return [analyze(text, classifier, response_type, history, on_error) for text in texts]
+
+    return [
+        _build_result(text, p['labels'][0], p['scores'][0], e['labels'][0], e['scores'][0],
+                      response_type, history)
+        for text, p, e in zip(texts, pattern_results, emotion_results)
+    ]
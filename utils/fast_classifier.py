@@ -0,0 +1,274 @@
+# utils/fast_classifier.py
+"""Small local classifier distilled from the zero-shot model.
+
+The pattern and emotion label sets never change, so instead of one MNLI pass
+per candidate label we can learn them directly. Train once against the
+zero-shot "teacher":
+
+    python -m utils.fast_classifier train --db user_journal.db
+    python -m utils.fast_classifier train --synthetic 3000
+
+then serve it with BUDDY_PATTERN_BACKEND=fast (or server.py --backend fast).
+Each label set gets a softmax-regression head over hashed word 1-2 grams and
+in-word character trigrams, so classifying an entry is a handful of row
+lookups in a numpy matrix. Training reports top-1 agreement with the teacher
+on a held-out split, and the numbers are saved with the model.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from utils.sample_entries import FILLERS, PATTERN_FRAGMENTS
+
+DEFAULT_PATH = os.environ.get("BUDDY_FAST_MODEL", "models/fast_classifier.npz")
+HASH_DIM = 1 << 18
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def featurize(text, dim=HASH_DIM):
+    """Hashed, L2-normalised bag of word 1-2 grams and character trigrams -> (indices, values)"""
+    words = _WORD.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    if not features:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    hashed = np.fromiter((zlib.crc32(f.encode("utf-8")) % dim for f in features), dtype=np.int64,
+                         count=len(features))
+    indices, counts = np.unique(hashed, return_counts=True)
+    values = counts.astype(np.float32)
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+class FastClassifier:
+    """Drop-in for the zero-shot pipeline on the label sets it was trained on.
+
+    Called as classifier(text_or_texts, candidate_labels=[...]) and returns the
+    same {'sequence', 'labels', 'scores'} dicts, sorted by score.
+    """
+
+    # A bag of n-grams has no input length limit, so analysis skips long-text windows
+    handles_long_text = True
+
+    def __init__(self, heads, dim=HASH_DIM, metadata=None):
+        # heads: name -> (labels, weights [dim x labels], bias [labels])
+        self.heads = heads
+        self.dim = dim
+        self.metadata = metadata or {}
+        self._by_labels = {frozenset(labels): name for name, (labels, _, _) in heads.items()}
+
+    def head_for(self, candidate_labels):
+        name = self._by_labels.get(frozenset(candidate_labels))
+        if name is None:
+            raise ValueError(f"Fast classifier has no head for labels {list(candidate_labels)}")
+        return name
+
+    def predict_proba(self, text, head):
+        labels, weights, bias = self.heads[head]
+        indices, values = featurize(text, self.dim)
+        return _softmax(values @ weights[indices] + bias)
+
+    def __call__(self, sequences, candidate_labels, **kwargs):
+        head = self.head_for(candidate_labels)
+        labels = self.heads[head][0]
+        single = isinstance(sequences, str)
+        results = []
+        for text in [sequences] if single else sequences:
+            scores = self.predict_proba(text, head)
+            order = np.argsort(-scores)
+            results.append({
+                "sequence": text,
+                "labels": [labels[i] for i in order],
+                "scores": [float(scores[i]) for i in order],
+            })
+        return results[0] if single else results
+
+    def save(self, path):
+        arrays = {"dim": np.array(self.dim), "metadata": np.array(json.dumps(self.metadata))}
+        for name, (labels, weights, bias) in self.heads.items():
+            arrays[f"{name}__labels"] = np.array(labels)
+            arrays[f"{name}__weights"] = weights
+            arrays[f"{name}__bias"] = bias
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, **arrays)
+        return path
+
+
+def load(path=DEFAULT_PATH):
+    """Load a trained FastClassifier (raises FileNotFoundError if it hasn't been trained yet)"""
+    with np.load(path, allow_pickle=False) as data:
+        names = {key.split("__")[0] for key in data.files if "__" in key}
+        heads = {
+            name: ([str(label) for label in data[f"{name}__labels"]],
+                   data[f"{name}__weights"], data[f"{name}__bias"])
+            for name in names
+        }
+        return FastClassifier(heads, int(data["dim"]), json.loads(str(data["metadata"])))
+
+
+def train_head(texts, targets, labels, dim=HASH_DIM, epochs=8, learning_rate=0.5, l2=1e-6, seed=0):
+    """Fit one softmax-regression head with plain SGD on the hashed features"""
+    label_index = {label: i for i, label in enumerate(labels)}
+    examples = [(featurize(text, dim), label_index[target]) for text, target in zip(texts, targets)]
+    weights = np.zeros((dim, len(labels)), dtype=np.float32)
+    bias = np.zeros(len(labels), dtype=np.float32)
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(examples)
+        rate = learning_rate / (1 + epoch)
+        for (indices, values), y in examples:
+            grad = _softmax(values @ weights[indices] + bias)
+            grad[y] -= 1.0
+            rows = weights[indices]
+            weights[indices] = rows - rate * (np.outer(values, grad) + l2 * rows)
+            bias -= rate * grad
+    return weights, bias
+
+
+def _holdout_split(items, holdout, rng):
+    items = list(items)
+    rng.shuffle(items)
+    cut = max(1, round(len(items) * holdout))
+    return items[cut:], items[:cut]
+
+
+def synthetic_corpus(count, holdout=0.2, seed=7):
+    """Synthetic entries whose held-out part is built from sentences training never sees.
+
+    The generator only has a few dozen sentences, so a plain random split would
+    put the same sentences on both sides and inflate agreement. Each pattern's
+    fragments and the filler sentences are split first; held-out entries are
+    then composed only from the held-out sentences.
+    Returns (texts, heldout_ids).
+    """
+    rng = random.Random(seed)
+    train_fragments, heldout_fragments = {}, {}
+    for pattern, fragments in PATTERN_FRAGMENTS.items():
+        train_fragments[pattern], heldout_fragments[pattern] = _holdout_split(fragments, holdout, rng)
+    train_fillers, heldout_fillers = _holdout_split(FILLERS, holdout, rng)
+    pools = {"train": (train_fragments, train_fillers), "heldout": (heldout_fragments, heldout_fillers)}
+
+    def make(split, n):
+        fragments, fillers = pools[split]
+        texts = []
+        for _ in range(n):
+            pattern = rng.choice(list(fragments))
+            sentences = [rng.choice(fragments[pattern]) + rng.choice([".", "?", "..."])]
+            sentences += [rng.choice(fillers) for _ in range(rng.randint(0, 4))]
+            texts.append(" ".join(sentences))
+        return list(dict.fromkeys(texts))
+
+    heldout_count = max(1, round(count * holdout))
+    train_texts, heldout_texts = make("train", count - heldout_count), make("heldout", heldout_count)
+    texts = train_texts + heldout_texts
+    return texts, list(range(len(train_texts), len(texts)))
+
+
+def load_corpus(db_path, limit=5000, holdout=0.2, seed=0):
+    """Unique entry texts from a journal database and a random held-out split.
+
+    Returns (texts, heldout_ids).
+    """
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT input_text FROM journal WHERE input_text != '' ORDER BY rowid DESC LIMIT ?",
+                        (limit,)).fetchall()
+    conn.close()
+    # Duplicates would leak between the training and held-out splits
+    texts = list(dict.fromkeys(r[0] for r in rows))
+    order = list(range(len(texts)))
+    random.Random(seed).shuffle(order)
+    return texts, sorted(order[:round(len(texts) * holdout)])
+
+
+def label_corpus(texts, teacher):
+    """Ask the zero-shot teacher for each entry's pattern and emotion"""
+    from utils import analysis
+    patterns, emotions = [], []
+    started = time.perf_counter()
+    for text in texts:
+        patterns.append(analysis.detect_overthinking_pattern(text, teacher)[0])
+        emotions.append(analysis.detect_dominant_emotion(text, teacher)[0])
+    return patterns, emotions, (time.perf_counter() - started) / max(len(texts), 1)
+
+
+def train(texts, patterns, emotions, heldout_ids, epochs=8, seed=0):
+    """Train both heads on everything outside heldout_ids, returning the classifier and its held-out report"""
+    from utils import analysis
+    heldout = set(heldout_ids)
+    test_ids = sorted(heldout)
+    train_ids = [i for i in range(len(texts)) if i not in heldout]
+
+    heads, report = {}, {"train_entries": len(train_ids), "heldout_entries": len(test_ids)}
+    for name, labels, targets in (("pattern", analysis.PATTERN_LABELS, patterns),
+                                  ("emotion", analysis.EMOTION_LABELS, emotions)):
+        # The teacher's error fallbacks ("emotion") aren't labels we can learn
+        ids = [i for i in train_ids if targets[i] in labels]
+        weights, bias = train_head([texts[i] for i in ids], [targets[i] for i in ids], labels,
+                                   epochs=epochs, seed=seed)
+        heads[name] = (list(labels), weights, bias)
+    classifier = FastClassifier(heads)
+
+    for name, labels, targets in (("pattern", analysis.PATTERN_LABELS, patterns),
+                                  ("emotion", analysis.EMOTION_LABELS, emotions)):
+        ids = [i for i in test_ids if targets[i] in labels]
+        started = time.perf_counter()
+        agreed = sum(classifier(texts[i], candidate_labels=labels)["labels"][0] == targets[i] for i in ids)
+        elapsed = time.perf_counter() - started
+        report[name] = {
+            "agreement": round(agreed / len(ids), 3) if ids else None,
+            "ms_per_entry": round(elapsed * 1000 / max(len(ids), 1), 3),
+        }
+    return classifier, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distil the zero-shot model into a fast local classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_cmd = sub.add_parser("train", help="Label a corpus with the zero-shot model and fit the fast model")
+    train_cmd.add_argument("--db", default=None, help="Journal database to take entries from")
+    train_cmd.add_argument("--synthetic", type=int, default=3000, help="Synthetic entries when --db is not given")
+    train_cmd.add_argument("--limit", type=int, default=5000)
+    train_cmd.add_argument("--holdout", type=float, default=0.2, help="Share of entries kept for the agreement check")
+    train_cmd.add_argument("--epochs", type=int, default=8)
+    train_cmd.add_argument("--model-dir", default=None, help="Exported teacher weights (see utils.model_store)")
+    train_cmd.add_argument("--out", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        from utils import analysis
+        if args.db:
+            texts, heldout_ids = load_corpus(args.db, args.limit, args.holdout)
+        else:
+            texts, heldout_ids = synthetic_corpus(args.synthetic, args.holdout)
+        if len(texts) < 10:
+            sys.exit("Need at least 10 unique entries to train")
+        teacher = analysis.load_classifier(args.model_dir, backend="zero-shot")
+        print(f"Labelling {len(texts)} entries with the zero-shot model...", file=sys.stderr)
+        patterns, emotions, teacher_seconds = label_corpus(texts, teacher)
+        classifier, report = train(texts, patterns, emotions, heldout_ids, args.epochs)
+        report["corpus"] = args.db or "synthetic (held-out sentences unseen in training)"
+        report["teacher_ms_per_entry"] = round(teacher_seconds * 1000, 1)
+        classifier.metadata = report
+        classifier.save(args.out)
+        print(json.dumps(report, indent=2))
+        print(f"Wrote {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# utils/journal_store.py
+"""SQLite storage for journal entries and spiral logs (no Streamlit here)."""
+import sqlite3
+from collections import Counter
+from datetime import datetime
+
+from utils import spiral_monitor
+from utils.tracing import span, traced
+
+JOURNAL_DB = "user_journal.db"
+SPIRAL_DB = "spiral_memory.db"
+
+
+def initialize_database(db_path=JOURNAL_DB):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            input_text TEXT,
+            mood TEXT,
+            spiral_level INTEGER,
+            pattern TEXT,
+            emotion TEXT,
+            response_type TEXT,
+            dominant_emotion TEXT,
+            emotion_confidence REAL
+        )
+    """)
+    # Journals created before the refined emotion was stored get the columns added
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(journal)")}
+    for column, kind in (("dominant_emotion", "TEXT"), ("emotion_confidence", "REAL")):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE journal ADD COLUMN {column} {kind}")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS spiral_state (
+            user_id TEXT PRIMARY KEY,
+            n INTEGER,
+            ewma REAL,
+            ewmvar REAL,
+            cusum REAL,
+            updated TEXT
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def _load_spiral_state(cursor, user_id):
+    row = cursor.execute("SELECT n, ewma, ewmvar, cusum FROM spiral_state WHERE user_id = ?",
+                         (user_id,)).fetchone()
+    return spiral_monitor.SpiralState(*row) if row else spiral_monitor.EMPTY_STATE
+
+
+def load_spiral_state(user_id="local", db_path=JOURNAL_DB):
+    """Current online spiral statistics for a user (one primary-key lookup)"""
+    conn = sqlite3.connect(db_path)
+    state = _load_spiral_state(conn.cursor(), user_id)
+    conn.close()
+    return state
+
+
+def save_entry(input_text, mood, spiral_level, pattern, emotion, response_type, db_path=JOURNAL_DB,
+               user_id="local", dominant_emotion=None, emotion_confidence=None):
+    """Insert one journal row and fold its spiral level into the user's online state.
+
+    `emotion` is the keyword emotion vector; dominant_emotion and
+    emotion_confidence hold the final (model-refined) emotion.
+    Returns (timestamp, alert) where alert is a spiral_monitor alert dict or None.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    with span("sqlite_commit"):
+        conn = sqlite3.connect(db_path)
+        c = conn.cursor()
+        # Take the write lock up front so the time spent waiting on other writers is visible
+        with span("sqlite_lock_wait"):
+            c.execute("BEGIN IMMEDIATE")
+        c.execute("""
+        INSERT INTO journal (timestamp, input_text, mood, spiral_level, pattern, emotion, response_type,
+                             dominant_emotion, emotion_confidence)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (timestamp, input_text, mood, spiral_level, pattern, emotion, response_type,
+              dominant_emotion, None if emotion_confidence is None else float(emotion_confidence)))
+        state, alert = spiral_monitor.update(_load_spiral_state(c, user_id), spiral_level)
+        c.execute("""
+        INSERT OR REPLACE INTO spiral_state (user_id, n, ewma, ewmvar, cusum, updated)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, *state, timestamp))
+        conn.commit()
+        conn.close()
+    return timestamp, alert
+
+
+def load_history(db_path=JOURNAL_DB):
+    """Load the 50 most recent journal entries"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT timestamp, input_text, mood, spiral_level, pattern, response_type FROM journal ORDER BY timestamp DESC LIMIT 50")
+    rows = cursor.fetchall()
+    conn.close()
+
+    history = []
+    for row in rows:
+        history.append({
+            'timestamp': row[0],
+            'input': row[1],
+            'mood': row[2],
+            'spiral_level': row[3],
+            'pattern': row[4],
+            'response_type': row[5],
+            'response': ""  # Responses aren't stored in DB in current setup
+        })
+
+    return history
+
+
+@traced("detect_spiral_patterns")
+def detect_spiral_patterns(db_path=SPIRAL_DB):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT timestamp, spiral_level, detected_emotion  FROM spiral_logs")
+    rows = cursor.fetchall()
+    conn.close()
+
+    if not rows:
+        return None  # not enough data
+
+    hours = []
+    weekdays = []
+    emotions = []
+
+    for row in rows:
+        ts, level, emotion = row
+        dt = datetime.fromisoformat(ts)
+        if int(level) >= 6:  # consider only high spirals
+            hours.append(dt.hour)
+            weekdays.append(dt.strftime("%A"))
+            emotions.append(emotion)
+
+    if not hours or not weekdays:
+        return None
+
+    # Get most common hour and day
+    common_hour = Counter(hours).most_common(1)[0][0]
+    common_day = Counter(weekdays).most_common(1)[0][0]
+    common_emotion = Counter(emotions).most_common(1)[0][0] if emotions else None
+
+    return {
+        "hour": common_hour,
+        "day": common_day,
+        "emotion": common_emotion
+    }
@@ -0,0 +1,136 @@
+# utils/model_store.py
+"""Share one read-only copy of the classifier weights between processes.
+
+Export the model once:
+    python -m utils.model_store export --out models/distilbert-mnli
+
+then point the app or server at it (BUDDY_MODEL_DIR=models/distilbert-mnli or
+server.py --model-dir ...). Every tensor is a view straight into an mmap of
+model.safetensors, so all workers on the host map the same page-cache pages
+instead of each holding a private copy.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import warnings
+
+WEIGHTS_FILE = "model.safetensors"
+
+# safetensors dtype tag -> torch dtype name
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8",
+    "U8": "uint8", "BOOL": "bool",
+}
+
+
+def default_thread_count(workers_per_host=None):
+    """Split the host's cores evenly between the workers running on it"""
+    workers = workers_per_host or int(os.environ.get("BUDDY_WORKERS_PER_HOST", "1"))
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def configure_threads(intra_op_threads=None):
+    """Cap torch's intra-op threads for this process so N workers don't oversubscribe the CPU.
+
+    Uses the explicit value, else BUDDY_INTRA_OP_THREADS, else cores / BUDDY_WORKERS_PER_HOST.
+    Returns the value applied, or None when nothing was configured.
+    """
+    if intra_op_threads is None:
+        env = os.environ.get("BUDDY_INTRA_OP_THREADS")
+        if env:
+            intra_op_threads = int(env)
+        elif os.environ.get("BUDDY_WORKERS_PER_HOST"):
+            intra_op_threads = default_thread_count()
+    if not intra_op_threads:
+        return None
+
+    import torch
+    torch.set_num_threads(intra_op_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # can only be set once, before any parallel work has run
+    return intra_op_threads
+
+
+def export_model(out_dir, model_name=None):
+    """Save the classifier, its config and tokenizer into out_dir as safetensors"""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from utils.analysis import MODEL_NAME
+
+    model_name = model_name or MODEL_NAME
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model.save_pretrained(out_dir, safe_serialization=True)
+    tokenizer.save_pretrained(out_dir)
+    return os.path.join(out_dir, WEIGHTS_FILE)
+
+
+def mmap_state_dict(path):
+    """Map a .safetensors file read-only and return (state_dict, mmap).
+
+    The tensors alias the mapping, so the mmap must stay open as long as they
+    are used, and nothing may write to them.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header_len = struct.unpack("<Q", mapped[:8])[0]
+    header = json.loads(mapped[8:8 + header_len])
+    data_start = 8 + header_len
+
+    state_dict = {}
+    with warnings.catch_warnings():
+        # torch warns that the buffer is not writable; that is the point here
+        warnings.simplefilter("ignore", UserWarning)
+        for name, info in header.items():
+            if name == "__metadata__":
+                continue
+            dtype = getattr(torch, _DTYPES[info["dtype"]])
+            begin, end = info["data_offsets"]
+            count = (end - begin) // torch.tensor([], dtype=dtype).element_size()
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + begin)
+            state_dict[name] = tensor.reshape(info["shape"])
+    return state_dict, mapped
+
+
+def load_shared_classifier(model_dir):
+    """Zero-shot pipeline whose weights are memory-mapped from model_dir/model.safetensors"""
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+    config = AutoConfig.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_config(config)
+    state_dict, mapped = mmap_state_dict(os.path.join(model_dir, WEIGHTS_FILE))
+    # assign=True swaps the freshly initialised parameters for the mapped views
+    missing, unexpected = model.load_state_dict(state_dict, strict=False, assign=True)
+    if missing or unexpected:
+        raise ValueError(f"Weights in {model_dir} don't match the config "
+                         f"(missing: {missing[:5]}, unexpected: {unexpected[:5]})")
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    model._buddy_weights_mmap = mapped  # keep the mapping alive with the model
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer, device=-1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the shared, memory-mapped classifier weights")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Download the model and save it as safetensors")
+    export.add_argument("--out", default="models/distilbert-mnli")
+    export.add_argument("--model", default=None, help="Hugging Face model id (default: the app's model)")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        path = export_model(args.out, args.model)
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# utils/near_duplicates.py
+"""Spot rumination loops: the same thought written again with small edits.
+
+Each entry gets a 64-bit SimHash over its words and word pairs. The hash is
+split into eight 8-bit bands that are indexed in SQLite, so a lookup only
+touches entries sharing at least one band. By pigeonhole, two hashes that
+differ in at most 7 bits always share a band, so every threshold down to
+57/64 (~0.89, the default is 0.9) finds all matches. Looser thresholds
+fall back to scanning the user's recent entries rather than missing loops.
+Matches reuse the stored pattern and emotion instead of paying for two
+classifier calls.
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta
+
+from utils.journal_store import JOURNAL_DB
+
+HASH_BITS = 64
+BANDS = 8
+BAND_BITS = HASH_BITS // BANDS
+DEFAULT_THRESHOLD = float(os.environ.get("BUDDY_NEAR_DUP_THRESHOLD", "0.9"))
+MAX_CANDIDATES = 200
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _features(text):
+    words = _WORD.findall(text.lower())
+    return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+def simhash(text):
+    """64-bit SimHash of the entry's words and word pairs"""
+    weights = [0] * HASH_BITS
+    for feature, count in _features(text).items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(HASH_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def similarity(a, b):
+    """Share of matching bits between two hashes (1.0 = identical)"""
+    return 1 - bin(a ^ b).count("1") / HASH_BITS
+
+
+def bands(h):
+    mask = (1 << BAND_BITS) - 1
+    return [h >> (i * BAND_BITS) & mask for i in range(BANDS)]
+
+
+def _to_signed(h):
+    # SQLite integers are signed 64-bit
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def _to_unsigned(h):
+    return h + (1 << 64) if h < 0 else h
+
+
+class NearDuplicateIndex:
+    """Per-user SimHash index of recent entries and their analysis results"""
+
+    def __init__(self, db_path=JOURNAL_DB, threshold=DEFAULT_THRESHOLD, window_days=30):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.window_days = window_days
+        self.initialize()
+
+    def initialize(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entry_signatures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                created TEXT,
+                simhash INTEGER,
+                band0 INTEGER,
+                band1 INTEGER,
+                band2 INTEGER,
+                band3 INTEGER,
+                band4 INTEGER,
+                band5 INTEGER,
+                band6 INTEGER,
+                band7 INTEGER,
+                pattern TEXT,
+                confidence REAL,
+                emotion TEXT,
+                emotion_confidence REAL
+            )
+        """)
+        self._migrate_bands(conn)
+        for i in range(BANDS):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_signatures_band{i} ON entry_signatures (user_id, band{i})")
+        conn.commit()
+        conn.close()
+
+    def _migrate_bands(self, conn):
+        """Re-band signatures stored with the old four 16-bit bands"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(entry_signatures)")}
+        if f"band{BANDS - 1}" in columns:
+            return
+        for i in range(BANDS):
+            if f"band{i}" not in columns:
+                conn.execute(f"ALTER TABLE entry_signatures ADD COLUMN band{i} INTEGER")
+        band_columns = ", ".join(f"band{i} = ?" for i in range(BANDS))
+        rows = conn.execute("SELECT id, simhash FROM entry_signatures").fetchall()
+        conn.executemany(f"UPDATE entry_signatures SET {band_columns} WHERE id = ?",
+                         [(*bands(_to_unsigned(h)), row_id) for row_id, h in rows])
+
+    def max_differing_bits(self):
+        """Most bits two hashes may differ in and still count as near-duplicates"""
+        return math.floor(HASH_BITS * (1 - self.threshold) + 1e-9)
+
+    def find(self, text, user_id="local"):
+        """Return (best_match, loop_count) for recent near-duplicates of text.
+
+        best_match is a dict with the stored pattern/emotion results (or None);
+        loop_count is how many recent entries are above the threshold.
+        """
+        h = simhash(text)
+        since = (datetime.now() - timedelta(days=self.window_days)).isoformat(timespec="seconds")
+        if self.max_differing_bits() < BANDS:
+            # One indexed probe per band, unioned, so the scan never touches unrelated entries
+            band_probes = " UNION ".join(
+                f"SELECT id FROM entry_signatures WHERE user_id = ? AND band{i} = ?" for i in range(BANDS)
+            )
+            params = [p for band in bands(h) for p in (user_id, band)]
+        else:
+            # Too loose for the bands to guarantee a shared one: check all of the user's recent entries
+            band_probes = "SELECT id FROM entry_signatures WHERE user_id = ?"
+            params = [user_id]
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(f"""
+            SELECT simhash, pattern, confidence, emotion, emotion_confidence
+            FROM entry_signatures
+            WHERE id IN ({band_probes}) AND created >= ?
+            ORDER BY id DESC LIMIT ?
+        """, (*params, since, MAX_CANDIDATES)).fetchall()
+        conn.close()
+
+        best, best_score, loop_count = None, 0.0, 0
+        for stored, pattern, confidence, emotion, emotion_confidence in rows:
+            score = similarity(h, _to_unsigned(stored))
+            if score < self.threshold:
+                continue
+            loop_count += 1
+            if score > best_score:
+                best_score = score
+                best = {
+                    "pattern": pattern,
+                    "confidence": confidence,
+                    "emotion": emotion,
+                    "emotion_confidence": emotion_confidence,
+                    "similarity": round(score, 3),
+                }
+        return best, loop_count
+
+    def add(self, text, pattern, confidence, emotion, emotion_confidence, user_id="local"):
+        """Remember an analysed entry so later loops can reuse its results"""
+        h = simhash(text)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            INSERT INTO entry_signatures
+                (user_id, created, simhash, band0, band1, band2, band3, band4, band5, band6, band7,
+                 pattern, confidence, emotion, emotion_confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, datetime.now().isoformat(timespec="seconds"), _to_signed(h), *bands(h),
+              pattern, float(confidence), emotion, float(emotion_confidence)))
+        conn.commit()
+        conn.close()
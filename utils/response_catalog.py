@@ -0,0 +1,100 @@
+# utils/response_catalog.py
+import json
+import os
+import random
+import threading
+import time
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "buddy_responses.json")
+RESPONSE_TYPES = ("validation", "tough_love", "humor", "distraction")
+INTENSITIES = ("low", "high")
+PLACEHOLDER = "{emotion}"
+
+
+class CatalogError(ValueError):
+    """Raised when a response catalog file is missing pieces or malformed"""
+
+
+def compile_template(template):
+    """Split a template into the literal chunks around {emotion}"""
+    parts = tuple(template.split(PLACEHOLDER))
+    for part in parts:
+        if "{" in part or "}" in part:
+            raise CatalogError(f"Only {PLACEHOLDER} may be substituted, found stray braces in: {template[:60]!r}")
+    return parts
+
+
+def compile_catalog(raw):
+    """Validate a raw {response_type: {intensity: [templates]}} dict and index it by (type, intensity)"""
+    if not isinstance(raw, dict):
+        raise CatalogError("Catalog must be a JSON object keyed by response type")
+
+    unknown = sorted(set(raw) - set(RESPONSE_TYPES))
+    if unknown:
+        raise CatalogError(f"Unknown response types: {', '.join(unknown)} (expected {', '.join(RESPONSE_TYPES)})")
+
+    index = {}
+    for response_type in RESPONSE_TYPES:
+        by_intensity = raw.get(response_type)
+        if not isinstance(by_intensity, dict):
+            raise CatalogError(f"Missing response type: {response_type}")
+        unknown = sorted(set(by_intensity) - set(INTENSITIES))
+        if unknown:
+            raise CatalogError(f"Unknown intensities for {response_type}: {', '.join(unknown)}")
+        for intensity in INTENSITIES:
+            templates = by_intensity.get(intensity)
+            if not templates or not all(isinstance(t, str) and t.strip() for t in templates):
+                raise CatalogError(f"{response_type}/{intensity} needs a non-empty list of templates")
+            index[(response_type, intensity)] = tuple(compile_template(t) for t in templates)
+    return index
+
+
+class ResponseCatalog:
+    """Buddy response templates loaded once from disk and looked up by (response_type, intensity).
+
+    The file is re-checked at most every `reload_interval` seconds; a broken edit
+    keeps the last good catalog in place and is reported through `last_error`.
+    """
+
+    def __init__(self, path=CATALOG_PATH, reload_interval=2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._mtime = None
+        self._index = {}
+        self.load()  # validate at startup; errors here should stop the app
+
+    def load(self):
+        """(Re)load the catalog file and swap it in atomically"""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as f:
+            index = compile_catalog(json.load(f))
+        self._index = index
+        self._mtime = mtime
+        self.last_error = None
+
+    def maybe_reload(self):
+        """Cheap hot-reload check, throttled so the hot path stays constant-time"""
+        now = time.monotonic()
+        if now < self._next_check or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + self.reload_interval
+            if os.stat(self.path).st_mtime_ns != self._mtime:
+                self.load()
+        except (OSError, ValueError) as e:
+            self.last_error = f"Kept previous response catalog: {e}"
+        finally:
+            self._lock.release()
+
+    def render(self, response_type, intensity, emotion, variant=None):
+        """Pick a template and fill in the emotion"""
+        self.maybe_reload()
+        options = self._index[(response_type, intensity)]
+        if variant is None:
+            parts = random.choice(options)
+        else:
+            parts = options[variant % len(options)]
+        return emotion.join(parts)
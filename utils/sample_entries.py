@@ -0,0 +1,57 @@
+# utils/sample_entries.py
+"""Sentences for synthetic journal entries.
+
+Shared by the benchmark data generator (benchmarks/synthetic_journal.py)
+and the fast classifier's synthetic training corpus (utils/fast_classifier.py).
+"""
+
+# Fragments are grouped by the pattern they tend to trigger so the generated
+# corpus exercises both the keyword fallback and the model paths.
+PATTERN_FRAGMENTS = {
+    "catastrophic thinking": [
+        "What if this turns into the worst possible outcome",
+        "I just know it's going to be a disaster tomorrow",
+        "Everything about this week feels terrible and awful",
+        "If I mess this up my whole career is over",
+    ],
+    "rumination": [
+        "I keep thinking about what I said at dinner",
+        "I can't stop thinking about that email from three years ago",
+        "I replay the conversation over and over in my head",
+        "Why did I say it like that, I keep going back to it",
+    ],
+    "self-doubt": [
+        "I'm not good enough for this job",
+        "Everyone else seems to get it and I feel stupid",
+        "I can't do this, I'm such a failure",
+        "Maybe they only hired me by mistake",
+    ],
+    "anxiety spiral": [
+        "I'm so anxious about the meeting that I can't breathe",
+        "What if they notice I'm nervous",
+        "My heart is racing and I'm scared for no reason",
+        "I feel a panic coming every time my phone buzzes",
+    ],
+    "decision paralysis": [
+        "I can't decide which offer to take",
+        "I don't know what to choose and it's eating me",
+        "What should I even do next, which one is right",
+        "Every option feels wrong so I pick nothing",
+    ],
+    "normal reflection": [
+        "Today was a good day and I went for a long walk",
+        "I had coffee with a friend and felt happy",
+        "Work was fine, nothing special happened",
+        "I'm grateful for the quiet evening",
+    ],
+}
+FILLERS = [
+    "I tried to distract myself but it didn't really work.",
+    "My friend says I'm overthinking it.",
+    "I should probably sleep but my brain won't stop.",
+    "I made tea and sat by the window for a while.",
+    "Is this normal?",
+    "Why does this always happen to me?",
+    "I feel sad and a bit lonely tonight.",
+    "Honestly I'm a little angry at myself.",
+]
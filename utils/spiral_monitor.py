@@ -0,0 +1,59 @@
+# utils/spiral_monitor.py
+"""Online escalation detector for spiral levels.
+
+Each user carries a tiny state (entry count, EWMA mean and variance of their
+spiral level, and a one-sided CUSUM). Every new level updates it in O(1):
+
+    z      = (level - ewma) / max(ewm_std, MIN_STD)
+    cusum  = max(0, cusum + z - CUSUM_SLACK)
+    alert  if z >= SPIKE_Z            -> a single sharp spike
+           or cusum >= CUSUM_LIMIT    -> a run of smaller rises (escalation)
+
+The state lives next to the journal (see journal_store.save_entry), so alerts
+never need a rescan of history.
+"""
+from collections import namedtuple
+
+EWMA_ALPHA = 0.3
+MIN_STD = 1.0
+SPIKE_Z = 2.5
+CUSUM_SLACK = 0.5
+CUSUM_LIMIT = 3.0
+WARMUP_ENTRIES = 5
+
+SpiralState = namedtuple("SpiralState", ["n", "ewma", "ewmvar", "cusum"])
+EMPTY_STATE = SpiralState(0, 0.0, 0.0, 0.0)
+
+
+def update(state, level):
+    """Fold one spiral level into the state; returns (new_state, alert or None)"""
+    n, ewma, ewmvar, cusum = state or EMPTY_STATE
+    if n == 0:
+        return SpiralState(1, float(level), 0.0, 0.0), None
+
+    std = max(ewmvar ** 0.5, MIN_STD)
+    z = (level - ewma) / std
+    cusum = max(0.0, cusum + z - CUSUM_SLACK)
+
+    alert = None
+    if n >= WARMUP_ENTRIES:
+        if z >= SPIKE_Z:
+            alert = {"kind": "spike", "level": level, "baseline": round(ewma, 1), "z": round(z, 2)}
+        elif cusum >= CUSUM_LIMIT:
+            alert = {"kind": "escalation", "level": level, "baseline": round(ewma, 1), "z": round(z, 2)}
+    if alert:
+        cusum = 0.0  # start counting afresh so one episode raises one alert
+
+    diff = level - ewma
+    ewma += EWMA_ALPHA * diff
+    ewmvar = (1 - EWMA_ALPHA) * (ewmvar + EWMA_ALPHA * diff * diff)
+    return SpiralState(n + 1, ewma, ewmvar, cusum), alert
+
+
+def describe(alert):
+    """Short, kind message for the buddy response area"""
+    if alert["kind"] == "spike":
+        return (f"🚨 This one is a big jump: spiral level {alert['level']}/10 against your usual "
+                f"~{alert['baseline']}. Let's slow down together before anything else.")
+    return (f"📈 Your last few entries have been climbing (now {alert['level']}/10, usually "
+            f"~{alert['baseline']}). That's an escalating spiral — worth pausing on.")
@@ -0,0 +1,191 @@
+# utils/tracing.py
+"""Lightweight stage timing for the submit path and the trends page.
+
+Turn it on with BUDDY_TRACE=1. When it is off, span() hands back a shared
+no-op context manager and traced() adds a single flag check per call.
+"""
+import copy
+import functools
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+# Upper bounds in seconds, Prometheus-style (the last bucket is +Inf)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+           0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+METRIC_NAME = "buddy_stage_seconds"
+METRICS_PATH = os.environ.get("BUDDY_METRICS_FILE", "buddy_metrics.prom")
+
+_enabled = os.environ.get("BUDDY_TRACE", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_histograms = {}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with interpolated percentiles"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        """Fold in a histogram recorded elsewhere (e.g. another process)"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = min(BUCKETS[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def record(name, seconds):
+    """Add one observation for a stage"""
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+
+
+def span(name):
+    """Context manager timing a block as stage `name`"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def traced(name):
+    """Decorator timing every call of a function as stage `name`"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Per-stage count and latency percentiles in milliseconds"""
+    with _lock:
+        return {
+            name: {
+                "count": hist.count,
+                "p50_ms": round(hist.percentile(50) * 1000, 2),
+                "p95_ms": round(hist.percentile(95) * 1000, 2),
+                "p99_ms": round(hist.percentile(99) * 1000, 2),
+                "max_ms": round(hist.max * 1000, 2),
+            }
+            for name, hist in sorted(_histograms.items())
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def histograms():
+    """Copy of the raw per-stage histograms, picklable for sending to merge() in another process"""
+    with _lock:
+        return {name: copy.deepcopy(hist) for name, hist in _histograms.items()}
+
+
+def merge(histograms):
+    """Add per-stage histograms recorded in another process to this one"""
+    with _lock:
+        for name, hist in histograms.items():
+            _histograms.setdefault(name, Histogram()).merge(hist)
+
+
+def to_prometheus():
+    """Render the histograms in the Prometheus text exposition format"""
+    lines = [f"# HELP {METRIC_NAME} Time spent per Overthinking Buddy stage",
+             f"# TYPE {METRIC_NAME} histogram"]
+    with _lock:
+        for name, hist in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, hist.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{name}"}} {hist.total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{name}"}} {hist.count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=METRICS_PATH):
+    """Replace the local metrics file with the current histograms.
+
+    The histograms are cumulative, so the file only ever holds the latest
+    snapshot. It is written to a temp file and renamed over the old one, so a
+    scraper never reads a half-written file.
+    """
+    if not _histograms:
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".buddy_metrics")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(f"# snapshot {datetime.now().isoformat(timespec='seconds')}\n")
+            f.write(to_prometheus())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise